@@ -0,0 +1,38 @@
+"""
+Migration script to add timestamp indexes used by the profit and close-operation history queries.
+
+Safe to run multiple times (CREATE INDEX IF NOT EXISTS).
+"""
+
+import os
+import sqlite3
+
+
+def migrate_add_timestamp_indexes():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    db_path = os.path.join(current_dir, "trading_sessions.db")
+
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}")
+        return
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_profit_mon_ts ON profit_monitoring(timestamp DESC);
+            CREATE INDEX IF NOT EXISTS idx_close_ops_ts ON position_close_operations(timestamp DESC);
+            """
+        )
+        conn.commit()
+        print("Timestamp indexes migration completed successfully!")
+        print(f"Database updated: {db_path}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate_add_timestamp_indexes()
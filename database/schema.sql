@@ -137,6 +137,10 @@ CREATE TABLE IF NOT EXISTS position_close_operations (
     error_message TEXT
 );
 
+-- Timestamp indexes for the profit/operations history queries (ORDER BY timestamp DESC)
+CREATE INDEX IF NOT EXISTS idx_profit_mon_ts ON profit_monitoring(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_close_ops_ts ON position_close_operations(timestamp DESC);
+
 -- Trading suspension management
 CREATE TABLE IF NOT EXISTS trading_suspension (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
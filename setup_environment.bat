@@ -102,6 +102,30 @@ if errorlevel 1 (
 echo [OK] Dependencies installed successfully
 echo.
 
+REM Optional accelerators: watchdog (command file events) and orjson (fast JSON)
+REM The monitors fall back to polling and the standard json module without them
+echo [EXTRA] Installing optional accelerators (watchdog, orjson)...
+pip install --prefer-binary watchdog orjson
+if errorlevel 1 (
+    echo [WARNING] Optional accelerators not installed, falling back to polling and stdlib json
+) else (
+    echo [OK] Optional accelerators installed
+)
+echo.
+
+REM Precompile the Numba kernels so the trading bot starts without a JIT stall (optional)
+python -c "import numba" >nul 2>&1
+if not errorlevel 1 (
+    echo [EXTRA] Compiling trading bot kernels...
+    python -m src.scripts._kernels_aot
+    if errorlevel 1 (
+        echo [WARNING] Kernel compilation failed, the bot will JIT compile on first use
+    ) else (
+        echo [OK] Trading bot kernels compiled
+    )
+    echo.
+)
+
 REM Create logs directory if it doesn't exist
 if not exist "%LOGS_DIR%" (
     echo [EXTRA] Creating logs directory...
@@ -8,7 +8,7 @@ import sqlite3
 import json
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 
 # Add project root to Python path
@@ -190,13 +190,15 @@ class TradingAPIService:
     def get_profit_history(self, hours: int = 24) -> List[Dict[str, Any]]:
         """Get profit monitoring history"""
         try:
+            # CURRENT_TIMESTAMP rows are UTC 'YYYY-MM-DD HH:MM:SS'; bind the cutoff in that form
+            cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
             conn = self.get_db_connection()
             try:
                 cursor = conn.execute('''
                     SELECT * FROM profit_monitoring
-                    WHERE timestamp >= datetime('now', '-' || ? || ' hours')
+                    WHERE timestamp >= ?
                     ORDER BY timestamp DESC
-                ''', (hours,))
+                ''', (cutoff,))
                 return [dict(row) for row in cursor.fetchall()]
             finally:
                 conn.close()
@@ -9,7 +9,7 @@ import sqlite3
 import json
 import os
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 import threading
 from concurrent.futures import ThreadPoolExecutor
@@ -365,20 +365,23 @@ class EnhancedTradingAPIService:
                 max_points = 100
                 interval_minutes = max(1, (hours * 60) // max_points)
                 
+                # CURRENT_TIMESTAMP rows are UTC 'YYYY-MM-DD HH:MM:SS'; bind the cutoff in that form
+                cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+                
                 cursor = conn.execute('''
                     SELECT timestamp, total_profit, total_loss, net_profit, 
                            balance, equity, total_positions
                     FROM profit_monitoring
-                    WHERE timestamp >= datetime('now', '-' || ? || ' hours')
+                    WHERE timestamp >= ?
                     AND (
                         strftime('%s', timestamp) % (? * 60) = 0
                         OR timestamp = (
                             SELECT MAX(timestamp) FROM profit_monitoring
-                            WHERE timestamp >= datetime('now', '-' || ? || ' hours')
+                            WHERE timestamp >= ?
                         )
                     )
                     ORDER BY timestamp ASC
-                ''', (hours, interval_minutes, hours))
+                ''', (cutoff, interval_minutes, cutoff))
                 
                 history = [dict(row) for row in cursor.fetchall()]
                 
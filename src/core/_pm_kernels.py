@@ -0,0 +1,50 @@
+"""
+Numeric kernels for the profit monitors
+Compiled with Numba when it is installed, otherwise served by NumPy equivalents
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def aggregate_positions(profit, volume, price_open):
+        """Return (profit_percent, total_profit, total_loss, profitable_count, losing_count)"""
+        n = profit.shape[0]
+        percent = np.zeros(n)
+        total_profit = 0.0
+        total_loss = 0.0
+        profitable_count = 0
+        losing_count = 0
+        for i in range(n):
+            position_value = volume[i] * price_open[i]
+            if position_value > 0:
+                percent[i] = profit[i] / position_value * 100
+            if profit[i] > 0:
+                total_profit += profit[i]
+                profitable_count += 1
+            else:
+                total_loss -= profit[i]
+                losing_count += 1
+        return percent, total_profit, total_loss, profitable_count, losing_count
+else:
+    def aggregate_positions(profit, volume, price_open):
+        """Return (profit_percent, total_profit, total_loss, profitable_count, losing_count)"""
+        position_value = volume * price_open
+        percent = np.zeros(profit.shape[0])
+        np.divide(profit * 100, position_value, out=percent, where=position_value > 0)
+        mask_pos = profit > 0
+        profitable_count = int(np.count_nonzero(mask_pos))
+        return (
+            percent,
+            float(profit[mask_pos].sum()),
+            float(np.abs(profit[~mask_pos]).sum()),
+            profitable_count,
+            profit.shape[0] - profitable_count
+        )
@@ -2,11 +2,16 @@ import sys
 import MetaTrader5 as mt5
 import time
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import json
 import os
 import math
 import sqlite3
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue, Empty
+import numpy as np
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -25,6 +30,98 @@ logging.basicConfig(
     ]
 )
 
+# SQL used on the hot record paths. Kept at module scope so every call hands
+# sqlite3 the same string object and hits the per-connection statement cache.
+_SQL_UPSERT_POSITION_HEAD = '''
+    INSERT INTO position_tracking (
+        ticket, symbol, type, volume, open_price, current_price,
+        profit, profit_percent, open_time, status
+    ) VALUES '''
+_SQL_UPSERT_POSITION_ROW = '(?, ?, ?, ?, ?, ?, ?, ?, ?, "open")'
+_SQL_UPSERT_POSITION_TAIL = '''
+    ON CONFLICT(ticket) DO UPDATE SET
+        current_price = excluded.current_price,
+        profit = excluded.profit,
+        profit_percent = excluded.profit_percent,
+        last_update = CURRENT_TIMESTAMP,
+        status = "open"
+'''
+
+# Bound parameters per upsert row, and rows per statement under SQLite's 999-variable limit
+_UPSERT_POSITION_PARAMS = 9
+_UPSERT_POSITION_BATCH = 999 // _UPSERT_POSITION_PARAMS
+
+_SQL_INSERT_PROFIT_MON = '''
+    INSERT INTO profit_monitoring (
+        total_positions, total_profit, total_loss, net_profit,
+        balance, equity, margin, free_margin
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_INSERT_CLOSE_OP = '''
+    INSERT INTO position_close_operations (
+        operation_type, positions_closed, positions_failed,
+        total_profit_closed, total_loss_closed, status,
+        error_message
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+@lru_cache(maxsize=None)
+def _upsert_position_sql(row_count):
+    """Multi-row position upsert for exactly row_count rows"""
+    rows = ', '.join([_SQL_UPSERT_POSITION_ROW] * row_count)
+    return _SQL_UPSERT_POSITION_HEAD + rows + _SQL_UPSERT_POSITION_TAIL
+
+
+def _upsert_positions(conn, position_rows):
+    """Upsert position rows using multi-row VALUES statements"""
+    for start in range(0, len(position_rows), _UPSERT_POSITION_BATCH):
+        batch = position_rows[start:start + _UPSERT_POSITION_BATCH]
+        params = [value for row in batch for value in row]
+        conn.execute(_upsert_position_sql(len(batch)), params)
+
+# Size of sqlite3's per-connection prepared statement cache
+_DB_CACHED_STATEMENTS = 128
+
+# Worker threads used to close a batch of positions (order sends stay serialized)
+_CLOSE_WORKERS = 8
+
+# SQL for each row tag handled by the background writer
+_WRITER_SQL = {
+    'close_op': _SQL_INSERT_CLOSE_OP,
+}
+
+# Seconds the background writer blocks waiting for rows before idling
+_WRITER_IDLE_TIMEOUT = 1.0
+
+# Cap on the WAL file size kept after checkpoints (64 MiB)
+_JOURNAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+# Minimum seconds between WAL truncating checkpoints taken after a tick flush
+_WAL_CHECKPOINT_INTERVAL = 30.0
+
+# Seconds a fetched account status is reused before querying MT5 again
+_ACCOUNT_STATUS_TTL = 0.25
+
+# Column layout of the structure-of-arrays view over MT5 positions
+_POSITION_DTYPE = np.dtype([('ticket', 'i8'), ('profit', 'f8'), ('type', 'i4')])
+
+
+def _positions_array(positions):
+    """Read the numeric columns of MT5 positions into one structured array"""
+    return np.fromiter(
+        ((pos.ticket, pos.profit, pos.type) for pos in positions),
+        dtype=_POSITION_DTYPE,
+        count=len(positions)
+    )
+
+# Boolean masks over the profit column for the close-by-condition operations
+_CLOSE_MASKS = {
+    'all': lambda profits: np.ones(profits.shape, dtype=bool),
+    'profit': lambda profits: profits > 0,
+    'loss': lambda profits: profits < 0,
+}
+
 class ProfitMonitor:
     def __init__(self):
         self.initialized = False
@@ -42,6 +139,28 @@ class ProfitMonitor:
         self.last_config_check = time.time()
         self.config_check_interval = 5  # Check for config changes every 5 seconds
         
+        # Serializes writers so one tick's writes land in a single transaction
+        self._write_lock = threading.Lock()
+        
+        # Batch closes run on a thread pool; order sends are still serialized so
+        # MT5 sees them one at a time, as in MarketSessionTradingBot
+        self._order_lock = threading.Lock()
+        
+        # Background writer: tagged rows are coalesced into one transaction per drain.
+        # The thread starts with the first queued row; once stopped, rows are written inline.
+        self._write_q = Queue()
+        self._write_conn = None
+        self._last_checkpoint = time.monotonic()
+        self._writer_state_lock = threading.Lock()
+        self._writer_thread = None
+        self._writer_stopped = False
+        
+        # Set by request_stop(); run() checks it and flushes the writer on its way out
+        self._stop_event = threading.Event()
+        
+        # (monotonic fetch time, status dict) of the last successful account status
+        self._acct_cache = (0.0, None)
+        
         self.initialize_mt5()
     
     def reload_config_if_changed(self):
@@ -157,6 +276,20 @@ class ProfitMonitor:
             logging.error(f"Error getting positions: {str(e)}")
             return []
 
+    def get_position_by_ticket(self, ticket):
+        """Get a single open position by ticket, or None if it is not open"""
+        try:
+            positions = mt5.positions_get(ticket=ticket)
+        except TypeError:
+            # Binding without the ticket filter: index the full list instead
+            positions_by_ticket = {pos.ticket: pos for pos in self.get_open_positions()}
+            return positions_by_ticket.get(ticket)
+        except Exception as e:
+            logging.error(f"Error getting position {ticket}: {str(e)}")
+            return None
+        
+        return positions[0] if positions else None
+
     def calculate_profit_percent(self, position):
         """Calculate profit percentage for a position"""
         try:
@@ -263,7 +396,8 @@ class ProfitMonitor:
             # Log the order details before sending
             logging.info(f"Attempting to close position {position.ticket} for {position.symbol} with volume {volume} at price {price}")
             
-            result = mt5.order_send(request)
+            with self._order_lock:
+                result = mt5.order_send(request)
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logging.error(f"Order failed: {result.comment} (Code: {result.retcode})")
                 
@@ -308,7 +442,8 @@ class ProfitMonitor:
                     }
                     
                     logging.info(f"Retrying with filling mode {filling_mode}")
-                    result = mt5.order_send(request)
+                    with self._order_lock:
+                        result = mt5.order_send(request)
                     
                     if result.retcode == mt5.TRADE_RETCODE_DONE:
                         logging.info(f"Successfully closed position {position.ticket} with filling mode {filling_mode}")
@@ -447,10 +582,7 @@ class ProfitMonitor:
                     total_loss += abs(position.profit)
                     losing_count += 1
             
-            # Update position tracking table
-            self.update_position_tracking(positions_data)
-            
-            # Update profit monitoring table
+            # Update position tracking and profit monitoring tables
             summary_data = {
                 'total_positions': len(positions),
                 'total_profit': total_profit,
@@ -465,7 +597,7 @@ class ProfitMonitor:
                 'positions_count': len(positions)
             }
             
-            self.update_profit_monitoring(summary_data)
+            self.flush_tick(positions_data, summary_data)
             
         except Exception as e:
             logging.error(f"Error updating positions in database: {str(e)}")
@@ -579,27 +711,39 @@ class ProfitMonitor:
         """Main monitoring loop"""
         logging.info("Starting autonomous profit monitor...")
         
-        while True:
-            try:
-                # Check for configuration changes
-                if self.reload_config_if_changed():
-                    logging.info("Configuration updated, applying new settings")
-                
-                # Process any pending commands from web interface
-                self.process_command_files()
-                
-                # Regular profit monitoring
-                self.manage_profitable_positions()
-                
-                # Sleep for the configured interval
-                time.sleep(self.config["check_interval"])
-                
-            except KeyboardInterrupt:
-                logging.info("Profit monitor stopped by user")
-                break
-            except Exception as e:
-                logging.error(f"Error in monitoring loop: {str(e)}")
-                time.sleep(60)  # Wait a minute before retrying on error
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    # Check for configuration changes
+                    if self.reload_config_if_changed():
+                        logging.info("Configuration updated, applying new settings")
+                    
+                    # Process any pending commands from web interface
+                    self.process_command_files()
+                    
+                    # Regular profit monitoring
+                    self.manage_profitable_positions()
+                    
+                    # Sleep for the configured interval, waking early on request_stop()
+                    self._stop_event.wait(self.config["check_interval"])
+                    
+                except KeyboardInterrupt:
+                    logging.info("Profit monitor stopped by user")
+                    break
+                except Exception as e:
+                    logging.error(f"Error in monitoring loop: {str(e)}")
+                    self._stop_event.wait(60)  # Wait a minute before retrying on error
+        finally:
+            self.stop_writer()
+        
+        logging.info("Profit monitor stopped")
+
+    def request_stop(self):
+        """Ask run() to exit after the current iteration.
+
+        Only sets a flag, so it is safe to call from a signal handler.
+        """
+        self._stop_event.set()
 
     def is_market_open(self, symbol: str):
         """Check if market is open for the symbol"""
@@ -625,6 +769,11 @@ class ProfitMonitor:
 
     def get_account_status(self):
         """Get current account status including balance, equity, and positions"""
+        now = time.monotonic()
+        cached_at, cached_status = self._acct_cache
+        if cached_status and now - cached_at < _ACCOUNT_STATUS_TTL:
+            return cached_status
+        
         try:
             if not self.initialized and not self.initialize_mt5():
                 return {
@@ -659,7 +808,7 @@ class ProfitMonitor:
             profitable_count = len([pos for pos in positions if pos.profit > 0])
             losing_count = len([pos for pos in positions if pos.profit < 0])
 
-            return {
+            status = {
                 'balance': account_info.balance,
                 'equity': account_info.equity,
                 'margin': account_info.margin,
@@ -672,6 +821,8 @@ class ProfitMonitor:
                 'net_profit': total_profit - total_loss,
                 'timestamp': datetime.now().isoformat()
             }
+            self._acct_cache = (now, status)
+            return status
         except Exception as e:
             logging.error(f"Error getting account status: {str(e)}")
             return {
@@ -691,10 +842,63 @@ class ProfitMonitor:
 
     def get_db_connection(self):
         """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, cached_statements=_DB_CACHED_STATEMENTS)
         conn.row_factory = sqlite3.Row
+        # Other processes keep the shared database open, so the -wal file is never
+        # removed on close; cap what each checkpoint leaves behind instead
+        conn.execute(f'PRAGMA journal_size_limit={_JOURNAL_SIZE_LIMIT}')
         return conn
 
+    @staticmethod
+    def _position_row(pos):
+        """Build the position_tracking upsert parameters for a formatted position"""
+        return (
+            pos['ticket'], pos['symbol'], pos['type'], pos['volume'],
+            pos['open_price'], pos['current_price'], pos['profit'],
+            pos['profit_percent'], pos['time']
+        )
+
+    @staticmethod
+    def _summary_row(summary_data):
+        """Build the profit_monitoring insert parameters for a summary dict"""
+        # Account status dicts report the count as positions_count
+        total_positions = summary_data.get('total_positions', summary_data.get('positions_count', 0))
+        return (
+            total_positions,
+            summary_data.get('total_profit', 0),
+            summary_data.get('total_loss', 0),
+            summary_data.get('net_profit', 0),
+            summary_data.get('balance', 0),
+            summary_data.get('equity', 0),
+            summary_data.get('margin', 0),
+            summary_data.get('free_margin', 0)
+        )
+
+    def flush_tick(self, positions_data, summary_data):
+        """Persist position tracking and the profit snapshot in one transaction"""
+        position_rows = [self._position_row(pos) for pos in positions_data]
+        summary_row = self._summary_row(summary_data)
+        
+        with self._write_lock:
+            conn = self.get_db_connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                
+                # Mark all positions as closed first
+                conn.execute('UPDATE position_tracking SET status = "closed" WHERE status = "open"')
+                _upsert_positions(conn, position_rows)
+                conn.execute(_SQL_INSERT_PROFIT_MON, summary_row)
+                
+                conn.commit()
+                
+                # Every tick passes through here, so this is where the WAL is kept bounded
+                self._checkpoint_if_due(conn)
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Error flushing positions to database: {str(e)}")
+            finally:
+                conn.close()
+
     def update_position_tracking(self, positions_data):
         """Update position tracking in database"""
         conn = self.get_db_connection()
@@ -705,23 +909,7 @@ class ProfitMonitor:
             conn.execute('UPDATE position_tracking SET status = "closed" WHERE status = "open"')
             
             # Update or insert each position
-            for pos in positions_data:
-                conn.execute('''
-                    INSERT INTO position_tracking (
-                        ticket, symbol, type, volume, open_price, current_price,
-                        profit, profit_percent, open_time, status
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, "open")
-                    ON CONFLICT(ticket) DO UPDATE SET
-                        current_price = excluded.current_price,
-                        profit = excluded.profit,
-                        profit_percent = excluded.profit_percent,
-                        last_update = CURRENT_TIMESTAMP,
-                        status = "open"
-                ''', (
-                    pos['ticket'], pos['symbol'], pos['type'], pos['volume'],
-                    pos['open_price'], pos['current_price'], pos['profit'],
-                    pos['profit_percent'], pos['time']
-                ))
+            _upsert_positions(conn, [self._position_row(pos) for pos in positions_data])
             
             conn.commit()
         except Exception as e:
@@ -734,21 +922,7 @@ class ProfitMonitor:
         """Update profit monitoring in database"""
         conn = self.get_db_connection()
         try:
-            conn.execute('''
-                INSERT INTO profit_monitoring (
-                    total_positions, total_profit, total_loss, net_profit,
-                    balance, equity, margin, free_margin
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                summary_data['total_positions'],
-                summary_data['total_profit'],
-                summary_data['total_loss'],
-                summary_data['net_profit'],
-                summary_data['balance'],
-                summary_data['equity'],
-                summary_data['margin'],
-                summary_data['free_margin']
-            ))
+            conn.execute(_SQL_INSERT_PROFIT_MON, self._summary_row(summary_data))
             conn.commit()
         except Exception as e:
             logging.error(f"Error updating profit monitoring: {str(e)}")
@@ -756,29 +930,149 @@ class ProfitMonitor:
             conn.close()
 
     def record_close_operation(self, operation_type, result):
-        """Record position close operation in database"""
-        conn = self.get_db_connection()
+        """Queue a position close operation record for the background writer"""
+        self._enqueue_row('close_op', (
+            operation_type,
+            result.get('closed', 0),
+            result.get('failed', 0),
+            result.get('total_profit_closed', 0),
+            result.get('total_loss_closed', 0),
+            'completed' if 'error' not in result else 'failed',
+            result.get('error', None)
+        ))
+
+    def _enqueue_row(self, tag, row):
+        """Hand a row to the background writer, or write it inline once the writer has stopped"""
+        with self._writer_state_lock:
+            if not self._writer_stopped:
+                if self._writer_thread is None:
+                    self._writer_thread = threading.Thread(
+                        target=self._writer_loop, name='profit-monitor-writer', daemon=True
+                    )
+                    self._writer_thread.start()
+                self._write_q.put((tag, row))
+                return
+        
+        # No thread drains the queue any more, so write on a connection of our own
+        with self._write_lock:
+            conn = self.get_db_connection()
+            try:
+                conn.execute(_WRITER_SQL[tag], row)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Error writing {tag} row: {str(e)}")
+            finally:
+                conn.close()
+
+    def _writer_loop(self):
+        """Drain queued rows and write each batch in a single transaction"""
+        while True:
+            try:
+                item = self._write_q.get(timeout=_WRITER_IDLE_TIMEOUT)
+            except Empty:
+                continue
+            
+            # Coalesce everything queued so far into this batch
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except Empty:
+                    break
+            
+            stopping = None in batch
+            rows_by_tag = {}
+            for entry in batch:
+                if entry is not None:
+                    tag, row = entry
+                    rows_by_tag.setdefault(tag, []).append(row)
+            
+            if rows_by_tag:
+                self._write_rows(rows_by_tag)
+            
+            if stopping:
+                if self._write_conn is not None:
+                    self._write_conn.close()
+                    self._write_conn = None
+                return
+
+    def _write_rows(self, rows_by_tag):
+        """Write tagged rows on the writer connection in one transaction"""
+        with self._write_lock:
+            try:
+                if self._write_conn is None:
+                    self._write_conn = self.get_db_connection()
+                for tag, rows in rows_by_tag.items():
+                    self._write_conn.executemany(_WRITER_SQL[tag], rows)
+                self._write_conn.commit()
+            except Exception as e:
+                if self._write_conn is not None:
+                    self._write_conn.rollback()
+                logging.error(f"Error writing queued rows {list(rows_by_tag)}: {str(e)}")
+
+    def _checkpoint_if_due(self, conn):
+        """Truncate the WAL on conn at most once per interval; the caller holds _write_lock"""
+        now = time.monotonic()
+        if now - self._last_checkpoint < _WAL_CHECKPOINT_INTERVAL:
+            return
+        self._last_checkpoint = now
+        
         try:
-            conn.execute('''
-                INSERT INTO position_close_operations (
-                    operation_type, positions_closed, positions_failed,
-                    total_profit_closed, total_loss_closed, status,
-                    error_message
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                operation_type,
-                result.get('closed', 0),
-                result.get('failed', 0),
-                result.get('total_profit_closed', 0),
-                result.get('total_loss_closed', 0),
-                'completed' if 'error' not in result else 'failed',
-                result.get('error', None)
-            ))
-            conn.commit()
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
         except Exception as e:
-            logging.error(f"Error recording close operation: {str(e)}")
-        finally:
-            conn.close()
+            logging.warning(f"WAL checkpoint failed: {str(e)}")
+
+    def stop_writer(self):
+        """Flush queued rows and stop the background writer.
+
+        Safe to call more than once. It joins the writer thread, so call it from
+        normal control flow (e.g. run()'s exit path), never from a signal handler.
+        """
+        with self._writer_state_lock:
+            if self._writer_stopped:
+                return
+            self._writer_stopped = True
+            thread = self._writer_thread
+            if thread is not None:
+                self._write_q.put(None)
+        
+        if thread is not None:
+            thread.join()
+
+    def _close_positions(self, positions, condition, close_fn):
+        """Close the positions matching condition with close_fn.
+
+        Returns (closed_count, failed_count, total_profit_closed, total_loss_closed).
+        """
+        close_mask = _CLOSE_MASKS.get(condition)
+        if close_mask is None:
+            # An unknown condition matches no positions, as the original if/elif chain did
+            return 0, 0, 0.0, 0.0
+
+        # Partition on the profit column in one pass, then pick the matching positions
+        profits = _positions_array(positions)['profit']
+        to_close = [positions[i] for i in np.flatnonzero(close_mask(profits))]
+
+        closed_profits = []
+        failed_count = 0
+
+        # Price and filling lookups overlap across workers; order_send itself is
+        # serialized by _order_lock
+        if to_close:
+            with ThreadPoolExecutor(max_workers=min(_CLOSE_WORKERS, len(to_close))) as executor:
+                futures = {executor.submit(close_fn, pos): pos for pos in to_close}
+                for future in as_completed(futures):
+                    if future.result():
+                        closed_profits.append(futures[future].profit)
+                    else:
+                        failed_count += 1
+
+        closed = np.array(closed_profits, dtype=np.float64)
+        total_profit_closed = float(closed[closed >= 0].sum())
+        total_loss_closed = float(np.abs(closed[closed < 0]).sum())
+
+        return len(closed_profits), failed_count, total_profit_closed, total_loss_closed
 
     def close_positions_by_type(self, position_type='all'):
         """Close positions based on type (all, profit, loss)"""
@@ -790,29 +1084,8 @@ class ProfitMonitor:
             if not positions:
                 return {'message': 'No positions to close', 'closed': 0, 'failed': 0}
 
-            closed_count = 0
-            failed_count = 0
-            total_profit_closed = 0
-            total_loss_closed = 0
-
-            for pos in positions:
-                should_close = False
-                if position_type == 'all':
-                    should_close = True
-                elif position_type == 'profit' and pos.profit > 0:
-                    should_close = True
-                elif position_type == 'loss' and pos.profit < 0:
-                    should_close = True
-
-                if should_close:
-                    if self.close_position(pos):
-                        closed_count += 1
-                        if pos.profit >= 0:
-                            total_profit_closed += pos.profit
-                        else:
-                            total_loss_closed += abs(pos.profit)
-                    else:
-                        failed_count += 1
+            closed_count, failed_count, total_profit_closed, total_loss_closed = \
+                self._close_positions(positions, position_type, self.close_position)
 
             result = {
                 'message': f'Closed {closed_count} positions, {failed_count} failed',
@@ -849,8 +1122,11 @@ class ProfitMonitor:
 
             positions = self.get_open_positions()
             formatted_positions = []
-            total_profit = 0
-            total_loss = 0
+
+            # Aggregate profit/loss in a single vectorized pass
+            profits = _positions_array(positions)['profit']
+            total_profit = float(profits[profits >= 0].sum())
+            total_loss = float(np.abs(profits[profits < 0]).sum())
 
             for pos in positions:
                 profit_percent = self.calculate_profit_percent(pos)
@@ -865,14 +1141,10 @@ class ProfitMonitor:
                     'current_price': current_price,
                     'profit': pos.profit,
                     'profit_percent': profit_percent,
-                    'time': datetime.fromtimestamp(pos.time).strftime('%Y-%m-%d %H:%M:%S')
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(pos.time))
                 }
 
                 formatted_positions.append(position_data)
-                if pos.profit >= 0:
-                    total_profit += pos.profit
-                else:
-                    total_loss += abs(pos.profit)
 
             account_status = self.get_account_status()
             if not account_status:
@@ -888,8 +1160,7 @@ class ProfitMonitor:
                 }
 
             # Update database
-            self.update_position_tracking(formatted_positions)
-            self.update_profit_monitoring(account_status)
+            self.flush_tick(formatted_positions, account_status)
 
             return {
                 'positions': formatted_positions,
@@ -921,24 +1192,8 @@ class ProfitMonitor:
                     return {"error": "MT5 not initialized"}
             
             positions = self.get_open_positions()
-            closed_count = 0
-            failed_count = 0
-            
-            for pos in positions:
-                should_close = False
-                
-                if condition == 'all':
-                    should_close = True
-                elif condition == 'profit' and pos.profit > 0:
-                    should_close = True
-                elif condition == 'loss' and pos.profit < 0:
-                    should_close = True
-                
-                if should_close:
-                    if self.close_position_with_retry(pos):
-                        closed_count += 1
-                    else:
-                        failed_count += 1
+            closed_count, failed_count, _, _ = \
+                self._close_positions(positions, condition, self.close_position_with_retry)
             
             return {
                 "status": "success",
@@ -958,14 +1213,7 @@ class ProfitMonitor:
                 if not self.initialize_mt5():
                     return {"error": "MT5 not initialized"}
             
-            positions = self.get_open_positions()
-            target_position = None
-            
-            for pos in positions:
-                if pos.ticket == ticket:
-                    target_position = pos
-                    break
-            
+            target_position = self.get_position_by_ticket(ticket)
             if target_position is None:
                 return {"error": f"Position {ticket} not found"}
             
@@ -983,13 +1231,15 @@ class ProfitMonitor:
 
     def get_profit_history(self, hours=24):
         """Get profit monitoring history"""
+        # CURRENT_TIMESTAMP rows are UTC 'YYYY-MM-DD HH:MM:SS'; bind the cutoff in that form
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
         conn = self.get_db_connection()
         try:
             cursor = conn.execute('''
                 SELECT * FROM profit_monitoring
-                WHERE timestamp >= datetime('now', '-' || ? || ' hours')
+                WHERE timestamp >= ?
                 ORDER BY timestamp DESC
-            ''', (hours,))
+            ''', (cutoff,))
             return [dict(row) for row in cursor.fetchall()]
         finally:
             conn.close()
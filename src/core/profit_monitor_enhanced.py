@@ -14,9 +14,15 @@ import os
 import math
 import sqlite3
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import atexit
+import zlib
+from itertools import repeat
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 from queue import Queue, Empty
 from typing import Dict, List, Optional, Tuple, Any
+import numpy as np
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,6 +30,20 @@ sys.path.insert(0, project_root)
 
 from src.config.config import load_config, LOGGING_CONFIG
 from src.config import get_config_manager
+from src.core._pm_kernels import aggregate_positions
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import PatternMatchingEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
@@ -35,6 +55,113 @@ logging.basicConfig(
     ]
 )
 
+# Pragmas applied once to each persistent database connection
+_DB_PRAGMAS = '''
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA busy_timeout=30000;
+    PRAGMA cache_size=-20000;
+'''
+
+# Per-connection prepared statement cache; every hot-path SQL string below
+# is a module constant so each one is parsed once per connection
+_DB_CACHED_STATEMENTS = 128
+
+_SQL_OPEN_TICKETS = 'SELECT ticket FROM position_tracking WHERE status = "open"'
+_SQL_DELETE_POSITION = 'DELETE FROM position_tracking WHERE ticket = ?'
+_SQL_UPSERT_POSITION = '''
+    INSERT INTO position_tracking 
+    (ticket, symbol, type, volume, open_price, current_price, 
+     profit, profit_percent, open_time, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(ticket) DO UPDATE SET
+        current_price = excluded.current_price,
+        profit = excluded.profit,
+        profit_percent = excluded.profit_percent,
+        last_update = CURRENT_TIMESTAMP,
+        status = excluded.status
+'''
+_SQL_INSERT_PROFIT_MON = '''
+    INSERT INTO profit_monitoring 
+    (total_positions, total_profit, total_loss, net_profit,
+     balance, equity, margin, free_margin)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+@lru_cache(maxsize=1024)
+def _iso_open_time(open_time: int) -> str:
+    """Format an MT5 open time as ISO text for storage and API output; each ticket's value never changes"""
+    return datetime.fromtimestamp(open_time).isoformat()
+
+def _load_command(filepath: str) -> Dict[str, Any]:
+    """Parse a command file, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+# Concurrent order_send calls; the terminal serializes most trade requests anyway
+_CLOSE_WORKERS = 4
+# Seconds allowed for each round of _CLOSE_WORKERS parallel closes
+_CLOSE_TIMEOUT = 10.0
+
+# Seconds between profit_monitoring rows while positions are unchanged
+_PROFIT_SNAPSHOT_INTERVAL = 30.0
+
+# Command status updates, written by the status writer thread
+_SQL_UPDATE_STATUS = 'UPDATE position_close_operations SET status = ? WHERE id = ?'
+_SQL_UPDATE_STATUS_RESULT = '''
+    UPDATE position_close_operations 
+    SET status = ?, 
+        positions_closed = ?, 
+        positions_failed = ?,
+        total_profit_closed = ?,
+        total_loss_closed = ?,
+        error_message = ?
+    WHERE id = ?
+'''
+_STATUS_BATCH_SIZE = 64
+
+if WATCHDOG_AVAILABLE:
+    class _CommandFileHandler(PatternMatchingEventHandler):
+        """Hands new command files to the monitor as soon as they appear"""
+        
+        def __init__(self, monitor: 'EnhancedProfitMonitor'):
+            super().__init__(patterns=['cmd_*.json'], ignore_directories=True)
+            self.monitor = monitor
+        
+        def on_created(self, event):
+            self.monitor._submit_command_file(event.src_path, from_watcher=True)
+        
+        def on_modified(self, event):
+            self.monitor._submit_command_file(event.src_path, from_watcher=True)
+        
+        def on_moved(self, event):
+            # Atomic writers rename a temp file into place
+            self.monitor._submit_command_file(event.dest_path, from_watcher=True)
+    
+    class _ConfigSignalHandler(PatternMatchingEventHandler):
+        """Flags a configuration reload when the signal file is written"""
+        
+        def __init__(self, monitor: 'EnhancedProfitMonitor'):
+            super().__init__(patterns=['config_changed.signal'], ignore_directories=True)
+            self.monitor = monitor
+        
+        def _flag(self):
+            self.monitor._config_dirty = True
+            self.monitor._wake.set()
+        
+        def on_created(self, event):
+            self._flag()
+        
+        def on_modified(self, event):
+            self._flag()
+        
+        def on_moved(self, event):
+            self._flag()
+
 class EnhancedProfitMonitor:
     """Enhanced profit monitor with real-time updates and fast processing"""
     
@@ -44,28 +171,45 @@ class EnhancedProfitMonitor:
         
         # Load configuration
         config = load_config()
-        self.config = config['profit_monitor']
+        # Read-only snapshot, replaced wholesale on reload so other threads never see a partial update
+        self.config = MappingProxyType(dict(config['profit_monitor']))
         self.mt5_config = config['mt5']
         
         # Database path
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
         self.db_path = os.path.join(project_root, config['db']['path'])
         
+        # One persistent connection per thread, closed at interpreter exit
+        self._tls = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        atexit.register(self._close_connections)
+        
         # Configuration manager for dynamic updates
         self.config_manager = get_config_manager()
         self.config_signal_file = os.path.join(project_root, 'config', 'config_changed.signal')
         self.last_config_check = 0
         self.config_check_interval = 3  # Check for config changes every 3 seconds (faster for enhanced)
+        self._last_signal_mtime_ns = None
+        
+        # Command file locations, created once up front
+        self._commands_dir = os.path.join(project_root, 'commands')
+        self._errors_dir = os.path.join(self._commands_dir, 'errors')
+        try:
+            os.makedirs(self._errors_dir, exist_ok=True)
+        except OSError as e:
+            logging.warning(f"Could not create command directories: {str(e)}")
         
         # Real-time data cache
-        self.positions_cache = {}
+        self.pos_arrays = None  # column arrays of the last positions snapshot
         self.profit_cache = {
             'total_profit': 0.0,
             'total_loss': 0.0,
             'net_profit': 0.0,
             'profitable_count': 0,
             'losing_count': 0,
-            'last_update': datetime.now()
+            'last_update': time.monotonic(),  # for age checks
+            'last_update_wall': time.time()   # for display; format at the edge
         }
         
         # Thread-safe queues for operations
@@ -75,19 +219,56 @@ class EnhancedProfitMonitor:
         # Thread pool for parallel operations
         self.executor = ThreadPoolExecutor(max_workers=4)
         
+        # Separate pool for closes so commands running on self.executor never
+        # wait on closes queued behind them, plus a cap on in-flight closes
+        self._close_executor = ThreadPoolExecutor(max_workers=_CLOSE_WORKERS, thread_name_prefix='position-close')
+        self._close_sem = threading.Semaphore(_CLOSE_WORKERS)
+        self._close_templates = {}  # symbol -> constant close request fields
+        
+        # Single writer for command status updates queued on update_queue
+        self._status_writer = threading.Thread(target=self._status_writer_loop, name='command-status-writer', daemon=True)
+        self._status_writer.start()
+        
         # Update frequency controls
         self.fast_update_interval = 1.0  # Fast updates every 1 second
         self.db_update_interval = 5.0    # Database updates every 5 seconds
         self.last_fast_update = 0
         self.last_db_update = 0
         
+        # Set to wake the run loop before its next scheduled deadline
+        self._wake = threading.Event()
+        
+        # Command files currently queued or executing, so none runs twice
+        self._inflight_commands = set()
+        self._inflight_lock = threading.Lock()
+        
+        # Watch the commands directory and config signal instead of polling them
+        self._observer = None
+        self._config_dirty = False
+        if WATCHDOG_AVAILABLE:
+            config_dir = os.path.dirname(self.config_signal_file)
+            try:
+                os.makedirs(config_dir, exist_ok=True)
+                self._observer = Observer()
+                self._observer.schedule(_CommandFileHandler(self), self._commands_dir, recursive=False)
+                self._observer.schedule(_ConfigSignalHandler(self), config_dir, recursive=False)
+                self._observer.start()
+            except Exception as e:
+                logging.warning(f"File watcher unavailable, falling back to polling: {str(e)}")
+                self._observer = None
+        
+        # Change detection for database writes
+        self._positions_fingerprint = None
+        self._last_written_fp = None
+        self._last_snapshot_write = 0
+        
         # Initialize MT5
         self.initialize_mt5()
     
     def reload_config_if_changed(self):
         """Check if configuration has changed and reload if necessary"""
         try:
-            current_time = time.time()
+            current_time = time.monotonic()
             
             # Only check periodically to avoid excessive file I/O
             if current_time - self.last_config_check < self.config_check_interval:
@@ -95,44 +276,59 @@ class EnhancedProfitMonitor:
             
             self.last_config_check = current_time
             
-            # Check if signal file exists and is newer
-            if os.path.exists(self.config_signal_file):
-                signal_mtime = os.path.getmtime(self.config_signal_file)
-                
-                # If signal file is recent (within last minute), reload config
-                if current_time - signal_mtime < 60:
-                    new_config = self.config_manager.get_profit_monitor_config()
-                    
-                    # Update configuration
-                    old_config = self.config.copy()
-                    self.config.update(new_config)
-                    
-                    # Update logging level if changed
-                    if old_config.get('log_level') != new_config.get('log_level'):
-                        log_level = getattr(logging, new_config.get('log_level', 'INFO'))
-                        logging.getLogger().setLevel(log_level)
-                    
-                    # Update intervals if changed
-                    if 'check_interval' in new_config:
-                        # For enhanced monitor, use faster intervals
-                        self.fast_update_interval = min(1.0, new_config['check_interval'] / 10)
-                        self.db_update_interval = min(5.0, new_config['check_interval'] / 2)
-                    
-                    logging.info(f"Enhanced monitor configuration reloaded: {list(new_config.keys())}")
-                    
-                    # Remove signal file
-                    try:
-                        os.remove(self.config_signal_file)
-                    except:
-                        pass
-                    
-                    return True
+            # One stat call; a signal already seen at this mtime was handled or stale
+            try:
+                st = os.stat(self.config_signal_file)
+            except FileNotFoundError:
+                return False
+            if st.st_mtime_ns == self._last_signal_mtime_ns:
+                return False
+            self._last_signal_mtime_ns = st.st_mtime_ns
+            
+            # If signal file is recent (within last minute), reload config;
+            # file mtimes are wall clock, so compare against time.time()
+            if time.time() - st.st_mtime < 60:
+                return self.reload_config_now()
             
             return False
             
         except Exception as e:
             logging.error(f"Error reloading configuration: {str(e)}")
             return False
+    
+    def reload_config_now(self):
+        """Reload configuration and consume the signal file"""
+        try:
+            new_config = self.config_manager.get_profit_monitor_config()
+            
+            # Update configuration
+            old_config = self.config
+            self.config = MappingProxyType({**old_config, **new_config})
+            
+            # Update logging level if changed
+            if old_config.get('log_level') != new_config.get('log_level'):
+                log_level = getattr(logging, new_config.get('log_level', 'INFO'))
+                logging.getLogger().setLevel(log_level)
+            
+            # Update intervals if changed
+            if 'check_interval' in new_config:
+                # For enhanced monitor, use faster intervals
+                self.fast_update_interval = min(1.0, new_config['check_interval'] / 10)
+                self.db_update_interval = min(5.0, new_config['check_interval'] / 2)
+            
+            logging.info(f"Enhanced monitor configuration reloaded: {list(new_config.keys())}")
+            
+            # Remove signal file
+            try:
+                os.remove(self.config_signal_file)
+            except:
+                pass
+            
+            return True
+            
+        except Exception as e:
+            logging.error(f"Error reloading configuration: {str(e)}")
+            return False
         
     def initialize_mt5(self):
         """Initialize MT5 connection with enhanced error handling"""
@@ -166,64 +362,114 @@ class EnhancedProfitMonitor:
             logging.error(f"MT5 initialization failed: {str(e)}")
             return False
 
-    def get_real_time_positions(self) -> List[Dict[str, Any]]:
-        """Get positions with optimized real-time calculations"""
+    def _refresh_positions(self) -> Optional[Dict[str, np.ndarray]]:
+        """Pull positions from MT5 into column arrays and update the profit cache"""
         try:
             positions = mt5.positions_get()
             if positions is None:
-                return []
-            
-            position_list = []
-            total_profit = 0.0
-            total_loss = 0.0
-            profitable_count = 0
-            losing_count = 0
-            
-            for pos in positions:
-                # Calculate profit percentage efficiently
-                position_value = pos.volume * pos.price_open
-                profit_percent = (pos.profit / position_value * 100) if position_value > 0 else 0
-                
-                position_data = {
-                    'ticket': pos.ticket,
-                    'symbol': pos.symbol,
-                    'type': 'BUY' if pos.type == mt5.ORDER_TYPE_BUY else 'SELL',
-                    'volume': pos.volume,
-                    'open_price': pos.price_open,
-                    'current_price': pos.price_current,
-                    'profit': pos.profit,
-                    'profit_percent': round(profit_percent, 2),
-                    'open_time': datetime.fromtimestamp(pos.time).isoformat(),
-                    'swap': getattr(pos, 'swap', 0),
-                    'commission': getattr(pos, 'commission', 0)
-                }
-                
-                position_list.append(position_data)
-                
-                # Update profit/loss totals
-                if pos.profit > 0:
-                    total_profit += pos.profit
-                    profitable_count += 1
-                else:
-                    total_loss += abs(pos.profit)
-                    losing_count += 1
+                return None
+            
+            # One array per field; the snapshot never holds per-position dicts
+            n = len(positions)
+            cols = {
+                'ticket': np.fromiter((pos.ticket for pos in positions), dtype=np.int64, count=n),
+                'symbol': np.array([pos.symbol for pos in positions], dtype=object),
+                'type': np.fromiter((pos.type for pos in positions), dtype=np.int8, count=n),
+                'magic': np.fromiter((pos.magic for pos in positions), dtype=np.int64, count=n),
+                'volume': np.fromiter((pos.volume for pos in positions), dtype=np.float64, count=n),
+                'price_open': np.fromiter((pos.price_open for pos in positions), dtype=np.float64, count=n),
+                'price_current': np.fromiter((pos.price_current for pos in positions), dtype=np.float64, count=n),
+                'profit': np.fromiter((pos.profit for pos in positions), dtype=np.float64, count=n),
+                'open_time': np.fromiter((pos.time for pos in positions), dtype=np.int64, count=n),
+                'swap': np.fromiter((getattr(pos, 'swap', 0) for pos in positions), dtype=np.float64, count=n),
+                'commission': np.fromiter((getattr(pos, 'commission', 0) for pos in positions), dtype=np.float64, count=n)
+            }
+            
+            profit_percent, total_profit, total_loss, profitable_count, losing_count = \
+                aggregate_positions(cols['profit'], cols['volume'], cols['price_open'])
+            cols['profit_percent'] = np.round(profit_percent, 2)
             
-            # Update cache
+            fingerprint = zlib.crc32(
+                cols['price_current'].tobytes(),
+                zlib.crc32(cols['profit'].tobytes(), zlib.crc32(cols['ticket'].tobytes()))
+            )
+            
+            # Update cache; the arrays are replaced in one assignment so
+            # readers on other threads always see a complete snapshot
+            self.pos_arrays = cols
+            self._positions_fingerprint = (n, fingerprint)
             self.profit_cache.update({
                 'total_profit': round(total_profit, 2),
                 'total_loss': round(total_loss, 2),
                 'net_profit': round(total_profit - total_loss, 2),
                 'profitable_count': profitable_count,
                 'losing_count': losing_count,
-                'total_count': len(position_list),
-                'last_update': datetime.now()
+                'total_count': n,
+                'last_update': time.monotonic(),
+                'last_update_wall': time.time()
             })
             
-            return position_list
+            return cols
             
         except Exception as e:
             logging.error(f"Error getting real-time positions: {str(e)}")
+            return None
+
+    def positions_iter(self, indices=None, cols: Optional[Dict[str, np.ndarray]] = None):
+        """Yield position dicts from a snapshot (the cached one by default), optionally only at indices.
+
+        open_time is left as raw MT5 seconds; get_real_time_positions formats it for callers.
+        """
+        if cols is None:
+            cols = self.pos_arrays
+            if cols is None:
+                return
+        if indices is not None:
+            cols = {name: column[indices] for name, column in cols.items()}
+        
+        buy = mt5.ORDER_TYPE_BUY
+        for ticket, symbol, type_raw, magic, volume, open_price, current_price, profit, pct, open_time, swap, commission in zip(
+            cols['ticket'].tolist(), cols['symbol'].tolist(), cols['type'].tolist(), cols['magic'].tolist(),
+            cols['volume'].tolist(), cols['price_open'].tolist(), cols['price_current'].tolist(),
+            cols['profit'].tolist(), cols['profit_percent'].tolist(), cols['open_time'].tolist(),
+            cols['swap'].tolist(), cols['commission'].tolist()
+        ):
+            yield {
+                'ticket': ticket,
+                'symbol': symbol,
+                'type': 'BUY' if type_raw == buy else 'SELL',
+                'type_raw': type_raw,
+                'magic': magic,
+                'volume': volume,
+                'open_price': open_price,
+                'current_price': current_price,
+                'profit': profit,
+                'profit_percent': pct,
+                'open_time': open_time,
+                'swap': swap,
+                'commission': commission
+            }
+
+    def get_real_time_positions(self) -> List[Dict[str, Any]]:
+        """Get positions with optimized real-time calculations"""
+        cols = self._refresh_positions()
+        if cols is None:
             return []
+        positions = list(self.positions_iter(cols=cols))
+        # Callers get ISO open times as before; the snapshot itself keeps raw seconds
+        for position in positions:
+            position['open_time'] = _iso_open_time(position['open_time'])
+        return positions
+
+    def _cached_position(self, ticket: int) -> Optional[Dict[str, Any]]:
+        """Find a position in the cached snapshot by ticket"""
+        cols = self.pos_arrays
+        if cols is None:
+            return None
+        index = np.flatnonzero(cols['ticket'] == ticket)
+        if not len(index):
+            return None
+        return next(self.positions_iter(index[:1], cols))
 
     def get_account_summary(self) -> Dict[str, Any]:
         """Get account summary with cached profit data"""
@@ -249,9 +495,9 @@ class EnhancedProfitMonitor:
     def close_positions_by_condition_fast(self, condition: str = 'all') -> Dict[str, Any]:
         """Fast parallel position closing with real-time updates"""
         try:
-            positions = self.get_real_time_positions()
+            cols = self._refresh_positions()
             
-            if not positions:
+            if cols is None or not len(cols['ticket']):
                 return {
                     'status': 'completed',
                     'message': 'No positions to close',
@@ -261,14 +507,14 @@ class EnhancedProfitMonitor:
                     'total_loss_closed': 0
                 }
             
-            # Filter positions based on condition
-            positions_to_close = []
+            # Filter positions based on condition, building dicts only for those selected
             if condition == 'profit':
-                positions_to_close = [p for p in positions if p['profit'] > 0]
+                selected = np.flatnonzero(cols['profit'] > 0)
             elif condition == 'loss':
-                positions_to_close = [p for p in positions if p['profit'] < 0]
+                selected = np.flatnonzero(cols['profit'] < 0)
             else:  # 'all'
-                positions_to_close = positions
+                selected = None
+            positions_to_close = list(self.positions_iter(selected, cols))
             
             if not positions_to_close:
                 return {
@@ -282,37 +528,50 @@ class EnhancedProfitMonitor:
             
             logging.info(f"Starting parallel close of {len(positions_to_close)} {condition} positions")
             
+            # Fetch one tick per distinct symbol up front, in parallel
+            symbols = list({position['symbol'] for position in positions_to_close})
+            ticks = dict(zip(symbols, self._close_executor.map(mt5.symbol_info_tick, symbols)))
+            
             # Close positions in parallel
-            futures = []
-            for position in positions_to_close:
-                future = self.executor.submit(self._close_single_position_fast, position)
-                futures.append((future, position))
+            futures = {
+                self._close_executor.submit(self._close_single_position_fast, position, ticks[position['symbol']]): position
+                for position in positions_to_close
+            }
             
-            # Collect results
+            # Collect results as they finish
             closed_count = 0
             failed_count = 0
             total_profit_closed = 0.0
             total_loss_closed = 0.0
+            timeout = _CLOSE_TIMEOUT * math.ceil(len(futures) / _CLOSE_WORKERS)
             
-            for future, position in futures:
-                try:
-                    result = future.result(timeout=10)  # 10 second timeout per position
-                    if result['success']:
-                        closed_count += 1
-                        if position['profit'] > 0:
-                            total_profit_closed += position['profit']
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    position = futures.pop(future)
+                    try:
+                        result = future.result()
+                        if result['success']:
+                            closed_count += 1
+                            if position['profit'] > 0:
+                                total_profit_closed += position['profit']
+                            else:
+                                total_loss_closed += abs(position['profit'])
+                            logging.info(f"[OK] Closed position {position['ticket']} ({position['symbol']})")
                         else:
-                            total_loss_closed += abs(position['profit'])
-                        logging.info(f"[OK] Closed position {position['ticket']} ({position['symbol']})")
-                    else:
+                            failed_count += 1
+                            logging.error(f"[FAILED] Failed to close position {position['ticket']}: {result['error']}")
+                    except Exception as e:
                         failed_count += 1
-                        logging.error(f"[FAILED] Failed to close position {position['ticket']}: {result['error']}")
-                except Exception as e:
+                        logging.error(f"[ERROR] Error closing position {position['ticket']}: {str(e)}")
+            except FutureTimeoutError:
+                # Whatever is left in futures did not finish in time
+                for future, position in futures.items():
+                    future.cancel()
                     failed_count += 1
-                    logging.error(f"[ERROR] Timeout/error closing position {position['ticket']}: {str(e)}")
+                    logging.error(f"[ERROR] Timeout closing position {position['ticket']}")
             
             # Update cache immediately
-            self.get_real_time_positions()
+            self._refresh_positions()
             
             result = {
                 'status': 'completed',
@@ -337,49 +596,54 @@ class EnhancedProfitMonitor:
                 'total_loss_closed': 0
             }
 
-    def _close_single_position_fast(self, position: Dict[str, Any]) -> Dict[str, Any]:
+    def _close_single_position_fast(self, position: Dict[str, Any], tick=None) -> Dict[str, Any]:
         """Close a single position quickly with optimized parameters"""
+        with self._close_sem:
+            return self._send_close_order(position, tick)
+
+    def _close_template(self, symbol: str) -> Dict[str, Any]:
+        """Get the constant part of a close request for symbol, building it on first use"""
+        template = self._close_templates.get(symbol)
+        if template is None:
+            template = self._close_templates.setdefault(symbol, {
+                "action": mt5.TRADE_ACTION_DEAL,
+                "symbol": symbol,
+                "deviation": 20,  # Increased deviation for faster execution
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC  # Immediate or Cancel for speed
+            })
+        return template
+
+    def _send_close_order(self, position: Dict[str, Any], tick=None) -> Dict[str, Any]:
+        """Send the close order for one position, pricing it from tick when one is given"""
         try:
+            # Request fields come from the cached positions snapshot
             ticket = position['ticket']
             symbol = position['symbol']
+            is_buy = position['type_raw'] == mt5.ORDER_TYPE_BUY
             
-            # Get MT5 position object
-            mt5_positions = mt5.positions_get(ticket=ticket)
-            if not mt5_positions:
-                return {'success': False, 'error': 'Position not found'}
-            
-            mt5_position = mt5_positions[0]
-            
-            # Get symbol info for optimal closing
-            symbol_info = mt5.symbol_info(symbol)
-            if symbol_info is None:
-                return {'success': False, 'error': f'Symbol {symbol} not found'}
-            
-            # Get current tick
-            tick = mt5.symbol_info_tick(symbol)
+            # Get current tick unless the caller prefetched it
+            if tick is None:
+                tick = mt5.symbol_info_tick(symbol)
             if tick is None:
                 return {'success': False, 'error': f'No tick data for {symbol}'}
             
             # Determine close price
-            if mt5_position.type == mt5.ORDER_TYPE_BUY:
+            if is_buy:
                 price = tick.bid
             else:
                 price = tick.ask
             
-            # Create close request with optimized parameters
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "position": ticket,
-                "symbol": symbol,
-                "volume": mt5_position.volume,
-                "type": mt5.ORDER_TYPE_SELL if mt5_position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,
-                "price": price,
-                "deviation": 20,  # Increased deviation for faster execution
-                "magic": mt5_position.magic,
-                "comment": f"Enhanced close {ticket}",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC  # Immediate or Cancel for speed
-            }
+            # Create close request from the symbol's template
+            request = self._close_template(symbol).copy()
+            request.update(
+                position=ticket,
+                volume=position['volume'],
+                type=mt5.ORDER_TYPE_SELL if is_buy else mt5.ORDER_TYPE_BUY,
+                price=price,
+                magic=position['magic'],
+                comment=f"Enhanced close {ticket}"
+            )
             
             # Send close order
             result = mt5.order_send(request)
@@ -411,31 +675,51 @@ class EnhancedProfitMonitor:
     def process_commands_async(self):
         """Process command files asynchronously"""
         try:
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            commands_dir = os.path.join(project_root, 'commands')
-            
-            if not os.path.exists(commands_dir):
-                return
-            
             # Process command files
-            for filename in os.listdir(commands_dir):
+            for filename in os.listdir(self._commands_dir):
                 if filename.startswith('cmd_') and filename.endswith('.json'):
-                    filepath = os.path.join(commands_dir, filename)
-                    
-                    try:
-                        with open(filepath, 'r') as f:
-                            command = json.load(f)
-                        
-                        # Process command in background
-                        self.executor.submit(self._execute_command_async, command, filepath)
-                        
-                    except Exception as e:
-                        logging.error(f"Error processing command file {filename}: {str(e)}")
-                        self._move_to_error_dir(filepath)
+                    self._submit_command_file(os.path.join(self._commands_dir, filename))
         
+        except FileNotFoundError:
+            return
         except Exception as e:
             logging.error(f"Error in async command processing: {str(e)}")
 
+    def _submit_command_file(self, filepath: str, from_watcher: bool = False):
+        """Load a command file and execute it in the background unless already in flight"""
+        with self._inflight_lock:
+            if filepath in self._inflight_commands:
+                return
+            self._inflight_commands.add(filepath)
+        
+        try:
+            command = _load_command(filepath)
+        except FileNotFoundError:
+            # Already processed and removed
+            self._release_command_file(filepath)
+            return
+        except ValueError as e:
+            self._release_command_file(filepath)
+            if from_watcher:
+                # A non-atomic writer may still be filling the file; a later event retries
+                return
+            logging.error(f"Error processing command file {os.path.basename(filepath)}: {str(e)}")
+            self._move_to_error_dir(filepath)
+            return
+        except Exception as e:
+            self._release_command_file(filepath)
+            logging.error(f"Error processing command file {os.path.basename(filepath)}: {str(e)}")
+            self._move_to_error_dir(filepath)
+            return
+        
+        # Process command in background
+        self.executor.submit(self._execute_command_async, command, filepath)
+
+    def _release_command_file(self, filepath: str):
+        """Allow a command file to be submitted again"""
+        with self._inflight_lock:
+            self._inflight_commands.discard(filepath)
+
     def _execute_command_async(self, command: Dict[str, Any], filepath: str):
         """Execute command asynchronously and update database"""
         try:
@@ -473,12 +757,17 @@ class EnhancedProfitMonitor:
             logging.error(f"Error executing async command: {str(e)}")
             self._update_command_status(command.get('id'), 'failed', {'error': str(e)})
             self._move_to_error_dir(filepath)
+        finally:
+            self._release_command_file(filepath)
 
     def _close_single_position_by_ticket(self, ticket: int) -> Dict[str, Any]:
         """Close a single position by ticket number"""
         try:
-            positions = self.get_real_time_positions()
-            position = next((p for p in positions if p['ticket'] == ticket), None)
+            # Use the last snapshot; refresh only if the ticket is newer than it
+            position = self._cached_position(ticket)
+            if position is None:
+                self._refresh_positions()
+                position = self._cached_position(ticket)
             
             if not position:
                 return {
@@ -515,47 +804,87 @@ class EnhancedProfitMonitor:
                 'failed': 1
             }
 
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get this thread's persistent database connection"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            # Autocommit mode: writers open explicit BEGIN IMMEDIATE transactions
+            conn = sqlite3.connect(
+                self.db_path, timeout=30.0, isolation_level=None, check_same_thread=False,
+                detect_types=0, cached_statements=_DB_CACHED_STATEMENTS
+            )
+            conn.executescript(_DB_PRAGMAS)
+            self._tls.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def _rollback_conn(self):
+        """Roll back any open transaction on this thread's connection"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is not None and conn.in_transaction:
+            conn.execute('ROLLBACK')
+
+    def _close_connections(self):
+        """Close every persistent database connection"""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
     def _update_command_status(self, command_id: int, status: str, result: Dict[str, Any] = None):
-        """Update command status in database with retry logic"""
+        """Queue a command status update for the status writer"""
+        self.update_queue.put(('status', command_id, status, result))
+
+    def _status_writer_loop(self):
+        """Drain queued status updates and write each batch in a single transaction"""
+        while True:
+            batch = [self.update_queue.get()]
+            while len(batch) < _STATUS_BATCH_SIZE:
+                try:
+                    batch.append(self.update_queue.get_nowait())
+                except Empty:
+                    break
+            
+            stopping = None in batch
+            updates = [item for item in batch if item is not None]
+            if updates:
+                self._write_status_batch(updates)
+            if stopping:
+                return
+
+    def _write_status_batch(self, updates: List[Tuple]):
+        """Apply status updates in queue order with retry logic"""
         max_retries = 3
         retry_delay = 0.1
         
         for attempt in range(max_retries):
             try:
-                conn = sqlite3.connect(self.db_path, timeout=30.0)  # 30 second timeout
-                conn.execute('PRAGMA journal_mode=WAL')  # Enable WAL mode for better concurrency
+                conn = self._get_conn()
+                conn.execute('BEGIN IMMEDIATE')
                 
-                if result:
-                    conn.execute('''
-                        UPDATE position_close_operations 
-                        SET status = ?, 
-                            positions_closed = ?, 
-                            positions_failed = ?,
-                            total_profit_closed = ?,
-                            total_loss_closed = ?,
-                            error_message = ?
-                        WHERE id = ?
-                    ''', (
-                        status,
-                        result.get('closed', 0),
-                        result.get('failed', 0),
-                        result.get('total_profit_closed', 0),
-                        result.get('total_loss_closed', 0),
-                        result.get('message', ''),
-                        command_id
-                    ))
-                else:
-                    conn.execute('''
-                        UPDATE position_close_operations 
-                        SET status = ? 
-                        WHERE id = ?
-                    ''', (status, command_id))
+                for _, command_id, status, result in updates:
+                    if result:
+                        conn.execute(_SQL_UPDATE_STATUS_RESULT, (
+                            status,
+                            result.get('closed', 0),
+                            result.get('failed', 0),
+                            result.get('total_profit_closed', 0),
+                            result.get('total_loss_closed', 0),
+                            result.get('message', ''),
+                            command_id
+                        ))
+                    else:
+                        conn.execute(_SQL_UPDATE_STATUS, (status, command_id))
                 
-                conn.commit()
-                conn.close()
+                conn.execute('COMMIT')
                 return  # Success, exit retry loop
                 
             except sqlite3.OperationalError as e:
+                self._rollback_conn()
                 if "database is locked" in str(e) and attempt < max_retries - 1:
                     logging.warning(f"Database locked, retrying in {retry_delay} seconds (attempt {attempt + 1}/{max_retries})")
                     time.sleep(retry_delay)
@@ -565,17 +894,15 @@ class EnhancedProfitMonitor:
                     logging.error(f"Error updating command status: {str(e)}")
                     break
             except Exception as e:
+                self._rollback_conn()
                 logging.error(f"Error updating command status: {str(e)}")
                 break
 
     def _move_to_error_dir(self, filepath: str):
         """Move failed command to error directory"""
         try:
-            error_dir = os.path.join(os.path.dirname(filepath), 'errors')
-            os.makedirs(error_dir, exist_ok=True)
-            
             filename = os.path.basename(filepath)
-            error_path = os.path.join(error_dir, filename)
+            error_path = os.path.join(self._errors_dir, filename)
             
             if os.path.exists(filepath):
                 os.rename(filepath, error_path)
@@ -584,6 +911,37 @@ class EnhancedProfitMonitor:
         except Exception as e:
             logging.error(f"Error moving file to error directory: {str(e)}")
 
+    def _write_positions(self, conn: sqlite3.Connection, cols: Dict[str, np.ndarray]):
+        """Sync position_tracking with a positions snapshot inside the caller's transaction"""
+        tickets = cols['ticket'].tolist()
+        
+        # Drop only the open rows whose positions are gone
+        live_tickets = set(tickets)
+        stale_tickets = [
+            (row[0],)
+            for row in conn.execute(_SQL_OPEN_TICKETS)
+            if row[0] not in live_tickets
+        ]
+        if stale_tickets:
+            conn.executemany(_SQL_DELETE_POSITION, stale_tickets)
+        
+        # Upsert current position data in place
+        if tickets:
+            position_data = zip(
+                tickets,
+                cols['symbol'].tolist(),
+                np.where(cols['type'] == mt5.ORDER_TYPE_BUY, 'BUY', 'SELL').tolist(),
+                cols['volume'].tolist(),
+                cols['price_open'].tolist(),
+                cols['price_current'].tolist(),
+                cols['profit'].tolist(),
+                cols['profit_percent'].tolist(),
+                [_iso_open_time(t) for t in cols['open_time'].tolist()],
+                repeat('open')
+            )
+            
+            conn.executemany(_SQL_UPSERT_POSITION, position_data)
+
     def update_database_fast(self):
         """Fast database update with optimized queries and retry logic"""
         max_retries = 3
@@ -591,41 +949,32 @@ class EnhancedProfitMonitor:
         
         for attempt in range(max_retries):
             try:
-                positions = self.get_real_time_positions()
+                cols = self._refresh_positions()
+                if cols is None:
+                    return  # No snapshot from MT5 this tick
+                position_count = len(cols['ticket'])
+                fingerprint = self._positions_fingerprint
+                now = time.monotonic()
+                
+                # Skip the write entirely when nothing changed, but keep the
+                # profit time series ticking on a slower cadence
+                positions_changed = fingerprint != self._last_written_fp
+                if not positions_changed and now - self._last_snapshot_write < _PROFIT_SNAPSHOT_INTERVAL:
+                    return
+                
                 account_summary = self.get_account_summary()
                 
-                conn = sqlite3.connect(self.db_path, timeout=30.0)  # 30 second timeout
-                conn.execute('PRAGMA journal_mode=WAL')  # Enable WAL mode for better concurrency
+                conn = self._get_conn()
                 
-                # Clear old position data
-                conn.execute('DELETE FROM position_tracking WHERE status = "open"')
+                # Write the whole tick as one transaction
+                conn.execute('BEGIN IMMEDIATE')
                 
-                # Batch insert new position data
-                if positions:
-                    position_data = [
-                        (
-                            p['ticket'], p['symbol'], p['type'], p['volume'],
-                            p['open_price'], p['current_price'], p['profit'],
-                            p['profit_percent'], p['open_time'], 'open'
-                        )
-                        for p in positions
-                    ]
-                    
-                    conn.executemany('''
-                        INSERT INTO position_tracking 
-                        (ticket, symbol, type, volume, open_price, current_price, 
-                         profit, profit_percent, open_time, status)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', position_data)
+                if positions_changed:
+                    self._write_positions(conn, cols)
                 
                 # Update profit monitoring
-                conn.execute('''
-                    INSERT INTO profit_monitoring 
-                    (total_positions, total_profit, total_loss, net_profit,
-                     balance, equity, margin, free_margin)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    len(positions),
+                conn.execute(_SQL_INSERT_PROFIT_MON, (
+                    position_count,
                     account_summary.get('total_profit', 0),
                     account_summary.get('total_loss', 0),
                     account_summary.get('net_profit', 0),
@@ -635,13 +984,15 @@ class EnhancedProfitMonitor:
                     account_summary.get('free_margin', 0)
                 ))
                 
-                conn.commit()
-                conn.close()
+                conn.execute('COMMIT')
+                self._last_written_fp = fingerprint
+                self._last_snapshot_write = now
                 
-                logging.debug(f"Database updated with {len(positions)} positions")
+                logging.debug(f"Database updated with {position_count} positions")
                 return  # Success, exit retry loop
                 
             except sqlite3.OperationalError as e:
+                self._rollback_conn()
                 if "database is locked" in str(e) and attempt < max_retries - 1:
                     logging.warning(f"Database locked during update, retrying in {retry_delay} seconds (attempt {attempt + 1}/{max_retries})")
                     time.sleep(retry_delay)
@@ -651,6 +1002,7 @@ class EnhancedProfitMonitor:
                     logging.error(f"Error in fast database update: {str(e)}")
                     break
             except Exception as e:
+                self._rollback_conn()
                 logging.error(f"Error in fast database update: {str(e)}")
                 break
 
@@ -659,18 +1011,32 @@ class EnhancedProfitMonitor:
         self.running = True
         logging.info("Starting Enhanced Profit Monitor with real-time updates...")
         
+        # Pick up commands and config signals written before the watcher started
+        if self._observer is not None:
+            self.process_commands_async()
+            if os.path.exists(self.config_signal_file):
+                self._config_dirty = True
+        
         try:
             while self.running:
-                current_time = time.time()
+                current_time = time.monotonic()
                 
                 # Check for configuration changes
-                if self.reload_config_if_changed():
+                if self._observer is None:
+                    config_changed = self.reload_config_if_changed()
+                elif self._config_dirty:
+                    self._config_dirty = False
+                    config_changed = self.reload_config_now()
+                else:
+                    config_changed = False
+                if config_changed:
                     logging.info("Enhanced monitor configuration updated, applying new settings")
                 
                 # Fast updates every 1 second (cache updates)
                 if current_time - self.last_fast_update >= self.fast_update_interval:
-                    self.get_real_time_positions()  # Updates cache
-                    self.process_commands_async()
+                    self._refresh_positions()  # Updates cache
+                    if self._observer is None:
+                        self.process_commands_async()
                     self.last_fast_update = current_time
                 
                 # Database updates every 5 seconds
@@ -678,8 +1044,15 @@ class EnhancedProfitMonitor:
                     self.update_database_fast()
                     self.last_db_update = current_time
                 
-                # Short sleep to prevent excessive CPU usage
-                time.sleep(0.1)
+                # Sleep until the next scheduled job is due, or until woken
+                next_deadline = min(
+                    self.last_fast_update + self.fast_update_interval,
+                    self.last_db_update + self.db_update_interval
+                )
+                if self._observer is None:
+                    next_deadline = min(next_deadline, self.last_config_check + self.config_check_interval)
+                self._wake.wait(max(0, next_deadline - time.monotonic()))
+                self._wake.clear()
                 
         except KeyboardInterrupt:
             logging.info("Enhanced Profit Monitor stopping...")
@@ -687,9 +1060,21 @@ class EnhancedProfitMonitor:
             logging.error(f"Error in enhanced monitor: {str(e)}")
         finally:
             self.running = False
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer.join()
             self.executor.shutdown(wait=True)
+            self._close_executor.shutdown(wait=True)
+            # Flush status updates queued by the commands that just finished
+            self.update_queue.put(None)
+            self._status_writer.join()
             logging.info("Enhanced Profit Monitor stopped")
 
+    def stop(self):
+        """Ask run_enhanced to exit after its current iteration"""
+        self.running = False
+        self._wake.set()
+
 if __name__ == "__main__":
     monitor = EnhancedProfitMonitor()
     monitor.run_enhanced() 
\ No newline at end of file
@@ -25,16 +25,31 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 import MetaTrader5 as mt5
-import pandas as pd
+import numpy as np
 import time
 import datetime
 import pytz
 from datetime import UTC
+import json
 import logging
 import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import cached_property, lru_cache, partial
+from itertools import chain, groupby
+from operator import itemgetter
 from typing import Dict, List, Tuple
 
 from src.config.config import load_config, LOGGING_CONFIG, TRADING_SESSIONS
+from src.scripts._njit import njit, NUMBA_AVAILABLE
+from src.scripts import _kernels_aot
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
@@ -46,9 +61,142 @@ logging.basicConfig(
     ]
 )
 
+logger = logging.getLogger(__name__)
+
 # Note: ConfigWatcher import removed as it's not used and module doesn't exist
 # from utils.config_watcher import ConfigWatcher
 
+# Pragmas applied once to the persistent connection; journal_mode=WAL persists in the database file
+_DB_PRAGMAS = '''
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA busy_timeout=5000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-16384;
+'''
+
+_SQL_UPSERT_SESSION = '''
+    INSERT INTO trading_sessions (name, start_time, end_time, volatility_factor, is_active)
+    VALUES (?, ?, ?, ?, 1)
+    ON CONFLICT(name) DO UPDATE SET
+        start_time = excluded.start_time,
+        end_time = excluded.end_time,
+        volatility_factor = excluded.volatility_factor,
+        is_active = 1
+'''
+
+_SQL_ACTIVE_SESSION_PAIRS = '''
+    SELECT s.id, s.name, time(s.start_time) as start_time, time(s.end_time) as end_time,
+           s.volatility_factor, cp.symbol, sp.trade_direction
+    FROM trading_sessions s
+    LEFT JOIN session_pairs sp ON sp.session_id = s.id AND sp.trade_direction != 'neutral'
+    LEFT JOIN currency_pairs cp ON cp.id = sp.pair_id AND cp.is_active = 1
+    WHERE s.is_active = 1
+    ORDER BY s.id
+'''
+
+def _hms(value: str) -> str:
+    """Normalize an HH:MM session time to HH:MM:SS for SQLite time columns"""
+    return f"{value}:00" if len(value) == 5 else value
+
+@lru_cache(maxsize=64)
+def _parse_hms(value: str) -> datetime.time:
+    """Parse an HH:MM:SS session time; the handful of distinct values are parsed once each"""
+    return datetime.datetime.strptime(value, '%H:%M:%S').time()
+
+def _minute_of_day(t) -> int:
+    """Minutes since midnight for a time or datetime"""
+    return t.hour * 60 + t.minute
+
+def _local_minute_of_day(now: datetime.datetime) -> int:
+    """Minutes since local midnight for an aware datetime, as written in order comments"""
+    local = time.localtime(now.timestamp())
+    return local.tm_hour * 60 + local.tm_min
+
+@lru_cache(maxsize=64)
+def _hms_minutes(value: str) -> int:
+    """Minute of day for an HH:MM:SS session time"""
+    return _minute_of_day(_parse_hms(value))
+
+def _make_level_calculator(pip_value: float, vol_mult: float, base_entry_pips: float,
+                           scalp_multiplier: float, digits: int, is_buy: bool):
+    """Limit/stop level function for one symbol and side, with its fixed constants bound in"""
+    base_distance = base_entry_pips * pip_value
+
+    def levels(current_price: float, candle_range: float, min_distance: float) -> Tuple[float, float]:
+        # Scale entry distance on candle range and volatility, never below the spread-based minimum
+        entry_distance = max(max(base_distance, candle_range * 0.1) * vol_mult * scalp_multiplier, min_distance)
+        if is_buy:
+            return round(current_price - entry_distance, digits), round(current_price + entry_distance, digits)
+        return round(current_price + entry_distance, digits), round(current_price - entry_distance, digits)
+
+    return levels
+
+def _session_active(start_min: int, end_min: int, current_min: int) -> bool:
+    """Whether current_min falls in [start_min, end_min), wrapping past midnight"""
+    if start_min < end_min:
+        return start_min <= current_min < end_min
+    return current_min >= start_min or current_min < end_min
+
+# Seconds a verified symbol's info is reused before asking MT5 again
+_SYMBOL_INFO_TTL = 1.0
+
+# Smallest magic treated as a placement epoch; older orders used the fixed magic 123456
+_MIN_PLACED_AT = 1_000_000_000
+
+# Seconds a daily ATR is reused; only the still-forming daily bar moves it intraday
+_ATR_CACHE_TTL = 60.0
+
+# Fraction of the daily ATR used for SL/TP distances, before session volatility scaling
+_SL_TP_ATR_FRACTION = 0.30
+
+# Length of an M30 bar; the last completed candle only changes when a new one opens
+_M30_SECONDS = 1800
+
+# Symbols processed concurrently per session; the work is mostly waiting on MT5 calls
+_SYMBOL_WORKERS = 8
+
+# Longest single sleep in the main loop, so Ctrl+C is handled promptly
+_MAX_IDLE_SLEEP = 5.0
+
+# Seconds between MT5 terminal heartbeats in the main loop
+_HEARTBEAT_INTERVAL = 30.0
+
+# Fields shared by this bot's orders; callers add symbol, volume, type, prices and comment,
+# and pending orders overwrite magic with their placement time
+_MARKET_ORDER_BASE = {
+    "action": mt5.TRADE_ACTION_DEAL,
+    "deviation": 10,
+    "magic": 123456,
+    "type_time": mt5.ORDER_TIME_GTC,
+    "type_filling": mt5.ORDER_FILLING_IOC,
+}
+_PENDING_ORDER_BASE = {**_MARKET_ORDER_BASE, "action": mt5.TRADE_ACTION_PENDING}
+
+# MT5 types by side, bound once at import: position, market order, and (limit, stop) pending orders
+_POSITION_TYPES = {"buy": mt5.POSITION_TYPE_BUY, "sell": mt5.POSITION_TYPE_SELL}
+_MARKET_ORDER_TYPES = {"buy": mt5.ORDER_TYPE_BUY, "sell": mt5.ORDER_TYPE_SELL}
+_PENDING_ORDER_TYPES = {
+    "buy": (mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP),
+    "sell": (mt5.ORDER_TYPE_SELL_LIMIT, mt5.ORDER_TYPE_SELL_STOP),
+}
+
+try:
+    # Built by src/scripts/_kernels_aot.py; loads without any JIT compile at startup
+    from src.scripts.mst_kernels import atr as _atr
+except ImportError:
+    if NUMBA_AVAILABLE:
+        _atr = njit(cache=True)(_kernels_aot.atr)
+    else:
+        def _atr(high, low, close, period):
+            """Average of the last `period` true ranges over daily high/low/close arrays"""
+            # The first bar has no previous close; using its own close leaves high - low
+            close_prev = np.empty_like(close)
+            close_prev[0] = close[0]
+            close_prev[1:] = close[:-1]
+            tr = np.maximum(high - low, np.maximum(np.abs(high - close_prev), np.abs(low - close_prev)))
+            return float(tr[-period:].mean())
+
 class MarketSessionTrader:
     def __init__(self):
         # Load configuration
@@ -71,39 +219,93 @@ class MarketSessionTrader:
         
         # Database configuration (project root to keep consistent across modules)
         self.db_path = os.path.join(project_root, self.config['db']['path'])
+        # The shared connection is opened with check_same_thread=False; every use holds this lock
+        self._db_lock = threading.Lock()
         self.sessions_synced = False
         self.sync_sessions_with_config()
         
         # Initialize last check time
         self.last_session_check = 0
+        self._last_heartbeat = 0.0
         
         # Bot status file path
         self.status_file = os.path.join(project_root, 'bot_status.json')
+        self._last_status = None
         
         # Track last seen automation symbols so we can stop trading when signals drop
         self._last_automation_symbols = set()
+        
+        # symbol -> (monotonic time verified, info dict); only verified symbols are cached
+        self._sym_cache = {}
+        
+        # Per-symbol constants, filled when a symbol first verifies
+        self._pip = {}
+        self._vol_mult = {}
+        
+        # (symbol, order_type) -> level function from _make_level_calculator
+        self._level_calculators = {}
+        
+        # Per-tick (positions by symbol, orders by symbol, stale symbols), see _load_trade_snapshot
+        self._trade_snapshot = None
+        
+        # (symbol, period) -> (monotonic time computed, ATR)
+        self._atr_cache = {}
+        
+        # symbol -> (local M30 bar index, MT5 forming bar open time, last completed candle)
+        self._candle_cache = {}
+        
+        # Each symbol's work runs on one worker, so per-symbol state is never shared;
+        # order sends are still serialized so MT5 sees them one at a time
+        self._symbol_pool = ThreadPoolExecutor(max_workers=_SYMBOL_WORKERS, thread_name_prefix='session-symbol')
+        self._order_lock = threading.Lock()
+        
+        # (symbol, order_type, comment minute) of pending batches placed this minute, and that minute
+        self._recent_batches = set()
+        self._recent_minute = None
 
-    def get_db_connection(self):
-        """Get a database connection"""
-        conn = sqlite3.connect(self.db_path)
+    @cached_property
+    def _db(self) -> sqlite3.Connection:
+        """Persistent database connection, opened and configured on first use"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        conn.executescript(_DB_PRAGMAS)
         return conn
+
+    def get_db_connection(self):
+        """Get the shared database connection; callers must not close it and must hold _db_lock while using it"""
+        return self._db
+
+    def close_db_connection(self):
+        """Close the shared database connection if it was opened"""
+        conn = self.__dict__.pop('_db', None)
+        if conn is not None:
+            conn.close()
     
     def update_bot_status(self, connected: bool, message: str = None):
-        """Update bot status file for web interface monitoring"""
+        """Update bot status file for web interface monitoring; unchanged states are not rewritten"""
+        message = message or ('Connected' if connected else 'Disconnected')
+        if self._last_status == (connected, message):
+            return
         try:
             status = {
                 'is_connected': connected,
                 'is_paused': False,  # Keep existing field for compatibility
                 'last_updated': datetime.datetime.now(UTC).isoformat(),
                 'bot_type': 'MarketSessionTradingBot',
-                'message': message or ('Connected' if connected else 'Disconnected')
+                'message': message
             }
-            with open(self.status_file, 'w') as f:
-                import json
-                json.dump(status, f, indent=2)
+            if ORJSON_AVAILABLE:
+                payload = orjson.dumps(status, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(status, indent=2).encode()
+            # Write beside the target and swap it in so the web interface never reads a partial file
+            tmp_path = f"{self.status_file}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.status_file)
+            self._last_status = (connected, message)
         except Exception as e:
-            logging.error(f"Error updating bot status: {str(e)}")
+            logger.error(f"Error updating bot status: {str(e)}")
     
     def sync_sessions_with_config(self):
         """
@@ -115,56 +317,44 @@ class MarketSessionTrader:
             return
         try:
             conn = self.get_db_connection()
-            cursor = conn.cursor()
             
-            # Upsert sessions based on configuration
-            for session in TRADING_SESSIONS:
-                name = session['name']
-                start_time = session['start_time']
-                end_time = session['end_time']
-                volatility = session.get('volatility_factor', 1.0)
+            sessions = [
+                (
+                    session['name'],
+                    _hms(session['start_time']),
+                    _hms(session['end_time']),
+                    session.get('volatility_factor', 1.0)
+                )
+                for session in TRADING_SESSIONS
+            ]
+            
+            # Whole sync runs as one transaction, committed on success
+            with self._db_lock, conn:
+                cursor = conn.cursor()
                 
-                # Normalize times to HH:MM:SS for SQLite time columns
-                if len(start_time) == 5:
-                    start_time = f"{start_time}:00"
-                if len(end_time) == 5:
-                    end_time = f"{end_time}:00"
+                # Upsert sessions based on configuration
+                cursor.executemany(_SQL_UPSERT_SESSION, sessions)
                 
-                cursor.execute('''
-                    INSERT OR IGNORE INTO trading_sessions (name, start_time, end_time, volatility_factor, is_active)
-                    VALUES (?, ?, ?, ?, 1)
-                ''', (name, start_time, end_time, volatility))
+                # Only map existing pairs from database - never create new pairs
+                session_ids = [row['id'] for row in cursor.execute('SELECT id FROM trading_sessions').fetchall()]
+                pair_ids = [row['id'] for row in cursor.execute('SELECT id FROM currency_pairs WHERE is_active = 1').fetchall()]
                 
-                cursor.execute('''
-                    UPDATE trading_sessions
-                    SET start_time = ?, end_time = ?, volatility_factor = ?, is_active = 1
-                    WHERE name = ?
-                ''', (start_time, end_time, volatility, name))
+                # Batch insert for better performance
+                if session_ids and pair_ids:
+                    mappings = [(session_id, pair_id) for session_id in session_ids for pair_id in pair_ids]
+                    cursor.executemany('''
+                        INSERT OR IGNORE INTO session_pairs (session_id, pair_id, trade_direction)
+                        VALUES (?, ?, 'neutral')
+                    ''', mappings)
             
-            # Only map existing pairs from database - never create new pairs
-            session_ids = [row['id'] for row in cursor.execute('SELECT id FROM trading_sessions').fetchall()]
-            pair_ids = [row['id'] for row in cursor.execute('SELECT id FROM currency_pairs WHERE is_active = 1').fetchall()]
-            
-            # Batch insert for better performance
-            if session_ids and pair_ids:
-                mappings = [(session_id, pair_id) for session_id in session_ids for pair_id in pair_ids]
-                cursor.executemany('''
-                    INSERT OR IGNORE INTO session_pairs (session_id, pair_id, trade_direction)
-                    VALUES (?, ?, 'neutral')
-                ''', mappings)
-            
-            conn.commit()
             self.sessions_synced = True
-            logging.info(f"Synced {len(session_ids)} sessions with {len(pair_ids)} pairs from database")
+            logger.info(f"Synced {len(session_ids)} sessions with {len(pair_ids)} pairs from database")
         except Exception as e:
-            logging.error(f"Error syncing sessions with config: {str(e)}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
+            logger.error(f"Error syncing sessions with config: {str(e)}")
         
-    def get_current_time(self, tz=None):
+    def get_current_time(self, tz=None, now: datetime.datetime = None):
         """Get current time in specified timezone (defaults to trading timezone)"""
-        current = datetime.datetime.now(UTC)
+        current = now or datetime.datetime.now(UTC)
         if tz is None:
             tz = self.trading_tz
         return current.astimezone(tz)
@@ -175,7 +365,7 @@ class MarketSessionTrader:
             to_tz = self.trading_tz
             
         # Parse the time string
-        time_obj = datetime.datetime.strptime(time_str, '%H:%M:%S').time()
+        time_obj = _parse_hms(time_str)
         
         # Create a datetime object for today with this time in UTC
         utc_dt = datetime.datetime.combine(
@@ -190,9 +380,9 @@ class MarketSessionTrader:
     def initialize_mt5(self):
         """Initialize MT5 connection"""
         try:
-            logging.info(f"Initializing MT5 with timezone: {self.local_tz.zone}")
-            logging.info(f"Server time (UTC): {self.get_current_time(pytz.UTC)}")
-            logging.info(f"Local time: {self.get_current_time(self.local_tz)}")
+            logger.info(f"Initializing MT5 with timezone: {self.local_tz.zone}")
+            logger.info(f"Server time (UTC): {self.get_current_time(pytz.UTC)}")
+            logger.info(f"Local time: {self.get_current_time(self.local_tz)}")
             
             config = self.config
             mt5_config = config['mt5']
@@ -217,41 +407,80 @@ class MarketSessionTrader:
             if not account_info:
                 raise RuntimeError("Failed to get account info")
                 
-            logging.info(f"Connected to: {account_info.server}")
-            logging.info(f"Account: {account_info.login}")
-            logging.info(f"Balance: {account_info.balance}")
+            logger.info(f"Connected to: {account_info.server}")
+            logger.info(f"Account: {account_info.login}")
+            logger.info(f"Balance: {account_info.balance}")
             
             self.initialized = True
-            logging.info("MT5 initialized successfully")
+            logger.info("MT5 initialized successfully")
             self.update_bot_status(True, f"Connected to MT5 - Account: {account_info.login}, Server: {account_info.server}")
             
         except Exception as e:
-            logging.error(f"MT5 initialization failed: {str(e)}")
+            logger.error(f"MT5 initialization failed: {str(e)}")
             self.initialized = False
             self.update_bot_status(False, f"Connection failed: {str(e)}")
             raise
 
+    def _check_connection(self):
+        """Reconnect if the MT5 terminal stopped answering; asks at most every _HEARTBEAT_INTERVAL"""
+        now = time.monotonic()
+        if now - self._last_heartbeat < _HEARTBEAT_INTERVAL:
+            return
+        self._last_heartbeat = now
+        
+        if mt5.terminal_info() is not None:
+            return
+        
+        logger.warning("MT5 terminal not responding, reconnecting")
+        self.initialized = False
+        self.update_bot_status(False, "MT5 connection lost, reconnecting")
+        # Cached symbol info is from the old session
+        self._sym_cache.clear()
+        mt5.shutdown()
+        self.initialize_mt5()
+
     def verify_symbol(self, symbol: str) -> bool:
         """Verify if symbol is available and enabled for trading"""
+        cached = self._sym_cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < _SYMBOL_INFO_TTL:
+            return True
+        
         try:
             symbol_info = mt5.symbol_info(symbol)
             if symbol_info is None:
-                logging.error(f"Symbol {symbol} not found")
+                logger.error(f"Symbol {symbol} not found")
+                self._sym_cache.pop(symbol, None)
                 return False
                 
             if not symbol_info.visible:
                 if not mt5.symbol_select(symbol, True):
-                    logging.error(f"Symbol {symbol} selection failed")
+                    logger.error(f"Symbol {symbol} selection failed")
+                    self._sym_cache.pop(symbol, None)
                     return False
+                # Quotes are only populated once the symbol is selected
+                symbol_info = mt5.symbol_info(symbol) or symbol_info
                     
             if not symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
-                logging.error(f"Symbol {symbol} not available for full trading")
+                logger.error(f"Symbol {symbol} not available for full trading")
+                self._sym_cache.pop(symbol, None)
                 return False
-                
+            
+            if symbol not in self._pip:
+                is_jpy = "JPY" in symbol
+                self._pip[symbol] = 0.01 if is_jpy else 0.0001
+                self._vol_mult[symbol] = 1.2 if is_jpy else 1.0
+            
+            self._sym_cache[symbol] = (time.monotonic(), {
+                "spread": symbol_info.spread * symbol_info.point,
+                "point": symbol_info.point,
+                "digits": symbol_info.digits,
+                "trade_mode": symbol_info.trade_mode
+            })
             return True
             
         except Exception as e:
-            logging.error(f"Error verifying symbol {symbol}: {str(e)}")
+            logger.error(f"Error verifying symbol {symbol}: {str(e)}")
+            self._sym_cache.pop(symbol, None)
             return False
 
     def get_symbol_info(self, symbol: str) -> Dict:
@@ -259,46 +488,67 @@ class MarketSessionTrader:
         try:
             if not self.verify_symbol(symbol):
                 return None
-                
-            info = mt5.symbol_info(symbol)
-            if info is None:
-                return None
-                
-            return {
-                "spread": info.spread * info.point,
-                "point": info.point,
-                "digits": info.digits,
-                "trade_mode": info.trade_mode
-            }
+            
+            # verify_symbol cached the info it just checked
+            return self._sym_cache[symbol][1]
         except Exception as e:
-            logging.error(f"Error getting symbol info for {symbol}: {str(e)}")
+            logger.error(f"Error getting symbol info for {symbol}: {str(e)}")
             return None
 
     def send_order(self, order_request: Dict) -> bool:
         """Send order with proper error handling"""
         try:
             if not self.initialized:
-                logging.error("MT5 not initialized")
+                logger.error("MT5 not initialized")
                 return False
                 
-            result = mt5.order_send(order_request)
+            with self._order_lock:
+                result = mt5.order_send(order_request)
             if result is None:
                 error = mt5.last_error()
-                logging.error(f"Order send failed: {error}")
+                logger.error(f"Order send failed: {error}")
                 return False
                 
             if result.retcode != mt5.TRADE_RETCODE_DONE:
-                logging.error(f"Order failed: {result.retcode}, {result.comment}")
+                logger.error(f"Order failed: {result.retcode}, {result.comment}")
                 return False
                 
-            logging.info(f"Order placed successfully: {result.order}")
+            logger.info("Order placed successfully: %s", result.order)
+            self._mark_symbol_stale(order_request.get('symbol'))
             return True
             
         except Exception as e:
-            logging.error(f"Error sending order: {str(e)}")
+            logger.error(f"Error sending order: {str(e)}")
             return False
 
-    def clean_expired_orders(self, symbol: str):
+    def _load_trade_snapshot(self):
+        """Fetch all positions and pending orders once and bucket them by symbol"""
+        positions_by_symbol = defaultdict(list)
+        orders_by_symbol = defaultdict(list)
+        for pos in mt5.positions_get() or ():
+            positions_by_symbol[pos.symbol].append(pos)
+        for order in mt5.orders_get() or ():
+            orders_by_symbol[order.symbol].append(order)
+        self._trade_snapshot = (positions_by_symbol, orders_by_symbol, set())
+
+    def _mark_symbol_stale(self, symbol: str):
+        """Make the next lookup for symbol ask MT5 again, after this tick changed its orders"""
+        if self._trade_snapshot is not None and symbol:
+            self._trade_snapshot[2].add(symbol)
+
+    def _symbol_trades(self, symbol: str) -> Tuple[List, List]:
+        """Get positions and pending orders for symbol, from the tick snapshot when one is loaded"""
+        if self._trade_snapshot is None:
+            return mt5.positions_get(symbol=symbol) or [], mt5.orders_get(symbol=symbol) or []
+        
+        positions_by_symbol, orders_by_symbol, stale = self._trade_snapshot
+        if symbol in stale:
+            positions_by_symbol[symbol] = list(mt5.positions_get(symbol=symbol) or ())
+            orders_by_symbol[symbol] = list(mt5.orders_get(symbol=symbol) or ())
+            stale.discard(symbol)
+        return positions_by_symbol[symbol], orders_by_symbol[symbol]
+
+    def clean_expired_orders(self, symbol: str, now: datetime.datetime = None):
         """Cancel orders that have been pending for too long"""
         try:
             if not self.verify_symbol(symbol):
@@ -308,143 +558,127 @@ class MarketSessionTrader:
             if self.max_positions == 1:
                 return
                 
-            orders = mt5.orders_get(symbol=symbol)
-            if orders is None:
+            _, orders = self._symbol_trades(symbol)
+            if not orders:
                 return
                 
-            now = datetime.datetime.now()
-            current_minutes = int((now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds() / 60)
+            now = now or datetime.datetime.now(UTC)
+            now_epoch = now.timestamp()
             
             for order in orders:
                 try:
-                    # Extract timestamp from order comment
+                    # Only this bot's scalping orders (comment SXXXX) expire
                     if not order.comment or not order.comment.startswith("S"):
                         continue
-                        
-                    try:
-                        # Parse minutes from comment (format: SXXXX where XXXX is minutes since midnight)
-                        order_minutes = int(order.comment[1:])
-                        
-                        # Handle orders across midnight
-                        if order_minutes > current_minutes:
-                            order_age = (current_minutes + 1440 - order_minutes)  # 1440 = minutes in a day
-                        else:
-                            order_age = current_minutes - order_minutes
-                        
-                        if order_age > self.order_expiry_minutes:
-                            request = {
-                                "action": mt5.TRADE_ACTION_REMOVE,
-                                "order": order.ticket,
-                                "comment": "Expired order"
-                            }
-                            self.send_order(request)
-                            logging.info(f"Cancelled expired order {order.ticket} for {symbol}, age: {order_age:.1f} minutes")
-                            
-                    except (ValueError, IndexError) as e:
-                        logging.warning(f"Could not parse minutes from order comment: {order.comment}, Error: {str(e)}")
-                        continue
+                    
+                    # Pending orders carry their placement time in magic
+                    if order.magic >= _MIN_PLACED_AT:
+                        order_age = (now_epoch - order.magic) / 60
+                    else:
+                        order_age = self._legacy_order_age(order.comment, now)
+                        if order_age is None:
+                            continue
+                    
+                    if order_age > self.order_expiry_minutes:
+                        request = {
+                            "action": mt5.TRADE_ACTION_REMOVE,
+                            "order": order.ticket,
+                            "comment": "Expired order"
+                        }
+                        self.send_order(request)
+                        self._mark_symbol_stale(symbol)
+                        logger.info("Cancelled expired order %s for %s, age: %.1f minutes", order.ticket, symbol, order_age)
                         
                 except Exception as e:
-                    logging.error(f"Error processing order {order.ticket}: {str(e)}")
+                    logger.error(f"Error processing order {order.ticket}: {str(e)}")
                     continue
                     
         except Exception as e:
-            logging.error(f"Error cleaning expired orders for {symbol}: {str(e)}")
+            logger.error(f"Error cleaning expired orders for {symbol}: {str(e)}")
+
+    def _legacy_order_age(self, comment: str, now: datetime.datetime):
+        """Age in minutes of an order placed before magic held its placement time"""
+        try:
+            # Parse minutes from comment (format: SXXXX where XXXX is minutes since midnight)
+            order_minutes = int(comment[1:])
+        except (ValueError, IndexError) as e:
+            logger.warning(f"Could not parse minutes from order comment: {comment}, Error: {str(e)}")
+            return None
+        
+        current_minutes = _local_minute_of_day(now)
+        
+        # Handle orders across midnight
+        if order_minutes > current_minutes:
+            return current_minutes + 1440 - order_minutes  # 1440 = minutes in a day
+        return current_minutes - order_minutes
 
     def combine_session_pairs(self, active_sessions: List[Tuple[str, Dict]]) -> Dict[str, List[str]]:
-        """Combine trading pairs from all active sessions"""
+        """Combine trading pairs from all active sessions, deduplicated in first-seen order"""
         try:
-            combined_pairs = {
-                'buy_pairs': set(),
-                'sell_pairs': set()
-            }
-            
-            for _, session in active_sessions:
-                combined_pairs['buy_pairs'].update(session['pairs'].keys())
-                combined_pairs['sell_pairs'].update(session['pairs'].keys())
-                
             return {
-                'buy_pairs': list(combined_pairs['buy_pairs']),
-                'sell_pairs': list(combined_pairs['sell_pairs'])
+                side: list(dict.fromkeys(chain.from_iterable(session[side] for _, session in active_sessions)))
+                for side in ('buy_pairs', 'sell_pairs')
             }
             
         except Exception as e:
-            logging.error(f"Error combining session pairs: {str(e)}")
+            logger.error(f"Error combining session pairs: {str(e)}")
             return {'buy_pairs': [], 'sell_pairs': []}
 
-    def get_active_sessions(self) -> List[Tuple[str, Dict]]:
+    def get_active_sessions(self, now: datetime.datetime = None) -> List[Tuple[str, Dict]]:
         """Get currently active trading sessions and their pairs"""
         try:
-            current_time = self.get_current_time().time()
+            current_min = _minute_of_day(self.get_current_time(now=now))
             conn = self.get_db_connection()
             
+            # Sessions and their directional pairs in one query; a session with
+            # no non-neutral active pairs still comes back as one row with a NULL symbol
+            with self._db_lock:
+                session_rows = conn.execute(_SQL_ACTIVE_SESSION_PAIRS).fetchall()
+            
             active_sessions = []
-            try:
-                # Get all sessions
-                cursor = conn.execute('''
-                    SELECT id, name, time(start_time) as start_time, time(end_time) as end_time,
-                           volatility_factor
-                    FROM trading_sessions
-                    WHERE is_active = 1
-                ''')
-                sessions = cursor.fetchall()
+            automation_pairs = None
+            for _, rows in groupby(session_rows, key=itemgetter('id')):
+                rows = list(rows)
+                session = rows[0]
+                start_min = _hms_minutes(session['start_time'])
+                end_min = _hms_minutes(session['end_time'])
                 
-                for session in sessions:
-                    start_time = datetime.datetime.strptime(session['start_time'], '%H:%M:%S').time()
-                    end_time = datetime.datetime.strptime(session['end_time'], '%H:%M:%S').time()
-                    
-                    # Check if session is active
-                    is_active = False
-                    if start_time < end_time:
-                        is_active = start_time <= current_time < end_time
-                    else:  # Session crosses midnight
-                        is_active = current_time >= start_time or current_time < end_time
+                if _session_active(start_min, end_min, current_min):
+                    # Optionally include automation-driven active pairs (additive; no change if empty/missing)
+                    if automation_pairs is None:
+                        with self._db_lock:
+                            automation_pairs = self._get_automation_active_pairs(conn)
+                    auto_buy, auto_sell = automation_pairs
                     
-                    if is_active:
-                        # Get pairs for this session
-                        cursor = conn.execute('''
-                            SELECT cp.symbol, sp.trade_direction
-                            FROM session_pairs sp
-                            JOIN currency_pairs cp ON cp.id = sp.pair_id
-                            WHERE sp.session_id = ? 
-                            AND cp.is_active = 1
-                            AND sp.trade_direction != 'neutral'
-                        ''', (session['id'],))
-                        pairs = cursor.fetchall()
-
-                        # Optionally include automation-driven active pairs (additive; no change if empty/missing)
-                        auto_buy, auto_sell = self._get_automation_active_pairs(conn)
-                        
-                        manual_buy_pairs = {row['symbol'] for row in pairs if row['trade_direction'] == 'buy'}
-                        manual_sell_pairs = {row['symbol'] for row in pairs if row['trade_direction'] == 'sell'}
-
-                        buy_pairs = set(manual_buy_pairs)
-                        sell_pairs = set(manual_sell_pairs)
-                        buy_pairs.update(auto_buy)
-                        sell_pairs.update(auto_sell)
-
-                        session_data = {
-                            'name': session['name'],
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'volatility_factor': session['volatility_factor'],
-                            'buy_pairs': sorted(list(buy_pairs)),
-                            'sell_pairs': sorted(list(sell_pairs)),
-                            # Extra fields for automation-aware management (non-breaking: core logic uses buy/sell_pairs)
-                            'manual_buy_pairs': sorted(list(manual_buy_pairs)),
-                            'manual_sell_pairs': sorted(list(manual_sell_pairs)),
-                            'auto_buy_pairs': sorted(list(set(auto_buy))),
-                            'auto_sell_pairs': sorted(list(set(auto_sell))),
-                        }
-                        active_sessions.append((session['name'], session_data))
-                
-                return active_sessions
-                
-            finally:
-                conn.close()
+                    manual_buy_pairs = {row['symbol'] for row in rows if row['trade_direction'] == 'buy' and row['symbol']}
+                    manual_sell_pairs = {row['symbol'] for row in rows if row['trade_direction'] == 'sell' and row['symbol']}
+
+                    buy_pairs = set(manual_buy_pairs)
+                    sell_pairs = set(manual_sell_pairs)
+                    buy_pairs.update(auto_buy)
+                    sell_pairs.update(auto_sell)
+
+                    session_data = {
+                        'name': session['name'],
+                        'start_time': _parse_hms(session['start_time']),
+                        'end_time': _parse_hms(session['end_time']),
+                        'start_min': start_min,
+                        'end_min': end_min,
+                        'volatility_factor': session['volatility_factor'],
+                        'buy_pairs': sorted(list(buy_pairs)),
+                        'sell_pairs': sorted(list(sell_pairs)),
+                        # Extra fields for automation-aware management (non-breaking: core logic uses buy/sell_pairs)
+                        'manual_buy_pairs': sorted(list(manual_buy_pairs)),
+                        'manual_sell_pairs': sorted(list(manual_sell_pairs)),
+                        'auto_buy_pairs': sorted(list(set(auto_buy))),
+                        'auto_sell_pairs': sorted(list(set(auto_sell))),
+                    }
+                    active_sessions.append((session['name'], session_data))
+            
+            return active_sessions
                 
         except Exception as e:
-            logging.error(f"Error getting active sessions: {str(e)}")
+            logger.error(f"Error getting active sessions: {str(e)}")
             return []
 
     def _get_automation_active_pairs(self, conn) -> Tuple[List[str], List[str]]:
@@ -472,7 +706,7 @@ class MarketSessionTrader:
             # Table doesn't exist (runner not installed/migrated) => keep existing behavior
             return [], []
         except Exception as e:
-            logging.warning(f"Automation active pairs read failed: {str(e)}")
+            logger.warning(f"Automation active pairs read failed: {str(e)}")
             return [], []
 
     def _get_current_automation_active_symbols(self) -> set:
@@ -484,11 +718,9 @@ class MarketSessionTrader:
         """
         try:
             conn = self.get_db_connection()
-            try:
+            with self._db_lock:
                 auto_buy, auto_sell = self._get_automation_active_pairs(conn)
-                return set(auto_buy) | set(auto_sell)
-            finally:
-                conn.close()
+            return set(auto_buy) | set(auto_sell)
         except Exception:
             return set()
 
@@ -522,21 +754,24 @@ class MarketSessionTrader:
                     }
                     self.send_order(request)
                 except Exception as e:
-                    logging.error(
+                    logger.error(
                         f"Error cancelling pending order {getattr(order, 'ticket', '?')} for {symbol}: {str(e)}"
                     )
         except Exception as e:
-            logging.error(f"Error cancelling automation pending orders for {symbol}: {str(e)}")
+            logger.error(f"Error cancelling automation pending orders for {symbol}: {str(e)}")
 
     def manage_session_orders(self):
         """Manage orders based on active sessions"""
         try:
+            # One clock read for the whole tick, passed down to everything that needs the time
+            now = datetime.datetime.now(UTC)
+            
             # Automation stop logic: if a previously-active automation symbol is no longer active,
             # stop trading it by cancelling this bot's pending orders for that symbol.
             current_auto_symbols = self._get_current_automation_active_symbols()
 
             # Get active sessions and their pairs
-            active_sessions = self.get_active_sessions()
+            active_sessions = self.get_active_sessions(now)
 
             # Determine which symbols are still "manual" trades in active sessions.
             manual_symbols = set()
@@ -551,43 +786,83 @@ class MarketSessionTrader:
             self._last_automation_symbols = set(current_auto_symbols)
 
             if not active_sessions:
-                logging.info("No active sessions found")
+                logger.info("No active sessions found")
                 return
+            
+            # One positions/orders fetch for the whole tick instead of one per symbol
+            self._load_trade_snapshot()
+            
+            # Batches are keyed by comment minute; forget them once the minute rolls over
+            minute = _local_minute_of_day(now)
+            if minute != self._recent_minute:
+                self._recent_batches.clear()
+                self._recent_minute = minute
+                
+            volatility_mult = self.get_session_volatility_multiplier(active_sessions)
+            
+            # One quote per symbol for the tick, shared by both sides and every session trading it
+            combined = self.combine_session_pairs(active_sessions)
+            ticks = self._snapshot_ticks(dict.fromkeys(chain(combined['buy_pairs'], combined['sell_pairs'])))
                 
-            logging.info(f"Found {len(active_sessions)} active sessions")
+            # Pair lists are only formatted when INFO is actually emitted
+            log_sessions = logger.isEnabledFor(logging.INFO)
+            if log_sessions:
+                logger.info("Found %d active sessions", len(active_sessions))
             for session_name, session_data in active_sessions:
-                logging.info(f"Processing session: {session_name}")
-                logging.info(f"Buy pairs: {session_data['buy_pairs']}")
-                logging.info(f"Sell pairs: {session_data['sell_pairs']}")
+                if log_sessions:
+                    logger.info("Processing session: %s", session_name)
+                    logger.info("Buy pairs: %s", session_data['buy_pairs'])
+                    logger.info("Sell pairs: %s", session_data['sell_pairs'])
                 
-                # Process buy pairs
+                # symbol -> sides to trade; a symbol's sides run in order on one worker
+                symbol_sides = defaultdict(list)
                 for symbol in session_data['buy_pairs']:
-                    if not self.verify_symbol(symbol):
-                        continue
-                    self.place_pending_orders(symbol, 'buy')
-                    
-                # Process sell pairs
+                    symbol_sides[symbol].append('buy')
                 for symbol in session_data['sell_pairs']:
-                    if not self.verify_symbol(symbol):
-                        continue
-                    self.place_pending_orders(symbol, 'sell')
+                    symbol_sides[symbol].append('sell')
+                
+                process = partial(self._process_symbol, volatility_mult=volatility_mult, now=now, ticks=ticks)
+                self._run_per_symbol(process, symbol_sides.items())
                     
                 # Clean up expired orders for all pairs (only for pending orders mode)
                 if self.max_positions > 1:
-                    all_pairs = set(session_data['buy_pairs']) | set(session_data['sell_pairs'])
-                    for symbol in all_pairs:
-                        self.clean_expired_orders(symbol)
+                    self._run_per_symbol(partial(self.clean_expired_orders, now=now), ((s,) for s in symbol_sides))
                     
         except Exception as e:
-            logging.error(f"Error managing session orders: {str(e)}")
+            logger.error(f"Error managing session orders: {str(e)}")
             raise
+        finally:
+            self._trade_snapshot = None
+
+    def _run_per_symbol(self, func, calls):
+        """Run func(symbol, *rest) for each call tuple on the pool and wait for all of them;
+        a failure is logged against its symbol without affecting the others"""
+        futures = {self._symbol_pool.submit(func, *args): args[0] for args in calls}
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is not None:
+                logger.error(f"Error processing {futures[future]}: {str(error)}")
+
+    def _snapshot_ticks(self, symbols) -> Dict:
+        """Fetch the current tick of each symbol on the pool; failed fetches map to None"""
+        symbols = list(symbols)
+        return dict(zip(symbols, self._symbol_pool.map(mt5.symbol_info_tick, symbols)))
+
+    def _process_symbol(self, symbol: str, sides: List[str], volatility_mult: float, now: datetime.datetime,
+                        ticks: Dict):
+        """Place orders for one symbol on each of its session sides"""
+        if not self.verify_symbol(symbol):
+            return
+        for order_type in sides:
+            # One guard per side, so a failure on one side still lets the other place
+            try:
+                self.place_pending_orders(symbol, order_type, volatility_mult, now, ticks.get(symbol))
+            except Exception as e:
+                logger.error(f"Error placing {order_type} orders for {symbol}: {str(e)}")
 
     def is_session_active(self, start: datetime.time, end: datetime.time, current: datetime.time) -> bool:
-        """Check if a session is currently active"""
-        if start < end:
-            return start <= current < end
-        else:  # Session goes over midnight UTC
-            return current >= start or current < end
+        """Check if a session is currently active (minute resolution, may cross midnight UTC)"""
+        return _session_active(_minute_of_day(start), _minute_of_day(end), _minute_of_day(current))
 
     def get_positions_count(self, symbol: str, order_type: str) -> int:
         """Get count of active positions and pending orders for a symbol and type"""
@@ -595,66 +870,73 @@ class MarketSessionTrader:
             if not self.verify_symbol(symbol):
                 return 0
                 
-            positions = mt5.positions_get(symbol=symbol)
-            pending_orders = mt5.orders_get(symbol=symbol)
+            position_type = _POSITION_TYPES.get(order_type)
+            if position_type is None:
+                return 0
+            pending_types = _PENDING_ORDER_TYPES[order_type]
+                
+            positions, pending_orders = self._symbol_trades(symbol)
             
-            total_count = 0
+            # Count matching positions over the type column in one vectorized pass
+            position_types = np.fromiter((pos.type for pos in positions), dtype=np.int32, count=len(positions))
+            total_count = int(np.count_nonzero(position_types == position_type))
             
-            # For direct market orders (max_positions = 1), only count actual positions
-            if self.max_positions == 1:
-                if positions:
-                    for pos in positions:
-                        if (order_type == "buy" and pos.type == mt5.POSITION_TYPE_BUY) or \
-                           (order_type == "sell" and pos.type == mt5.POSITION_TYPE_SELL):
-                            total_count += 1
-            else:
-                # For pending orders mode, count both positions and pending orders
-                if positions:
-                    for pos in positions:
-                        if (order_type == "buy" and pos.type == mt5.POSITION_TYPE_BUY) or \
-                           (order_type == "sell" and pos.type == mt5.POSITION_TYPE_SELL):
-                            total_count += 1
-                
-                if pending_orders:
-                    for order in pending_orders:
-                        if order_type == "buy" and order.type in [mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP]:
-                            total_count += 1
-                        elif order_type == "sell" and order.type in [mt5.ORDER_TYPE_SELL_LIMIT, mt5.ORDER_TYPE_SELL_STOP]:
-                            total_count += 1
+            # For pending orders mode, count pending orders too; direct market
+            # orders (max_positions = 1) only count actual positions
+            if self.max_positions != 1 and pending_orders:
+                order_types = np.fromiter((order.type for order in pending_orders), dtype=np.int32, count=len(pending_orders))
+                total_count += int(np.count_nonzero(np.isin(order_types, pending_types)))
             
             return total_count
             
         except Exception as e:
-            logging.error(f"Error getting positions count for {symbol}: {str(e)}")
+            logger.error(f"Error getting positions count for {symbol}: {str(e)}")
             return 0
 
     def get_30m_candle(self, symbol: str) -> Dict:
-        """Get the last completed 30-minute candle"""
+        """Get the last completed 30-minute candle, fetched from MT5 once per bar"""
         try:
             if not self.verify_symbol(symbol):
                 return None
+            
+            bar = int(time.time()) // _M30_SECONDS
+            cached = self._candle_cache.get(symbol)
+            if cached is not None and cached[0] == bar:
+                # Callers scale the range in place, so hand out a copy
+                return dict(cached[2])
                 
             rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M30, 0, 2)
             if rates is None or len(rates) < 2:
-                logging.error(f"Failed to get candle data for {symbol}")
+                logger.error(f"Failed to get candle data for {symbol}")
                 return None
                 
             # Use index 1 for the last completed candle
             candle = rates[1]
             candle_range = abs(candle['high'] - candle['low'])
             
-            return {
+            result = {
                 "high": candle["high"],
                 "low": candle["low"],
                 "close": candle["close"],
                 "range": candle_range
             }
+            
+            # Keep it for the rest of the bar only once MT5 has rolled over too; if the
+            # server clock lags ours the same forming bar comes back and the next call asks again
+            forming = int(rates[0]['time'])
+            if cached is None or cached[1] != forming:
+                self._candle_cache[symbol] = (bar, forming, result)
+            return dict(result)
         except Exception as e:
-            logging.error(f"Error getting candle data for {symbol}: {str(e)}")
+            logger.error(f"Error getting candle data for {symbol}: {str(e)}")
             return None
 
     def calculate_daily_atr(self, symbol: str, period: int = 14) -> float:
         """Calculate Daily ATR (Average True Range)"""
+        cached = self._atr_cache.get((symbol, period))
+        if cached is not None and time.monotonic() - cached[0] < _ATR_CACHE_TTL:
+            return cached[1]
+        
         try:
             if not self.verify_symbol(symbol):
                 return None
@@ -662,46 +944,48 @@ class MarketSessionTrader:
             # Get daily rates for ATR calculation
             rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_D1, 0, period + 1)
             if rates is None or len(rates) < period + 1:
-                logging.error(f"Failed to get daily rates for ATR calculation for {symbol}")
+                logger.error(f"Failed to get daily rates for ATR calculation for {symbol}")
                 return None
 
-            # Convert rates to pandas DataFrame
-            df = pd.DataFrame(rates)
-            
-            # Calculate True Range
-            df['high_low'] = df['high'] - df['low']
-            df['high_close'] = abs(df['high'] - df['close'].shift(1))
-            df['low_close'] = abs(df['low'] - df['close'].shift(1))
-            
-            df['tr'] = df[['high_low', 'high_close', 'low_close']].max(axis=1)
-            
-            # Calculate ATR
-            atr = df['tr'].rolling(window=period).mean().iloc[-1]
-            
+            # Calculate ATR straight from the rate fields (True Range averaged over the last period bars)
+            atr = _atr(rates['high'], rates['low'], rates['close'], period)
+            self._atr_cache[(symbol, period)] = (time.monotonic(), atr)
             return atr
             
         except Exception as e:
-            logging.error(f"Error calculating ATR for {symbol}: {str(e)}")
+            logger.error(f"Error calculating ATR for {symbol}: {str(e)}")
+            return None
+
+    def _atr_distances(self, symbol: str, atr_multiplier: float) -> Tuple[float, float]:
+        """(stop loss distance, take profit distance) from the daily ATR, or None"""
+        symbol_info = self.get_symbol_info(symbol)
+        if not symbol_info:
             return None
+            
+        # Get daily ATR
+        atr = self.calculate_daily_atr(symbol)
+        if not atr:
+            return None
+            
+        distance = atr * atr_multiplier
+        
+        # Ensure stop loss minimum distance based on spread
+        min_distance = symbol_info['spread'] * self.min_spread_multiplier
+        return max(distance, min_distance), distance
 
-    def get_atr_based_stop_loss(self, symbol: str, entry_price: float, order_type: str, atr_multiplier: float = 1.0) -> float:
-        """Calculate stop loss based on ATR"""
+    def get_atr_based_stop_loss(self, symbol: str, entry_price: float, order_type: str, atr_multiplier: float = 1.0,
+                                stop_distance: float = None) -> float:
+        """Calculate stop loss based on ATR, or on a distance already taken from _atr_distances"""
         try:
             symbol_info = self.get_symbol_info(symbol)
             if not symbol_info:
                 return None
-                
-            # Get daily ATR
-            atr = self.calculate_daily_atr(symbol)
-            if not atr:
-                return None
-                
-            # Calculate stop loss distance using ATR
-            stop_distance = atr * atr_multiplier
             
-            # Ensure minimum distance based on spread
-            min_distance = symbol_info['spread'] * self.min_spread_multiplier
-            stop_distance = max(stop_distance, min_distance)
+            if stop_distance is None:
+                distances = self._atr_distances(symbol, atr_multiplier)
+                if not distances:
+                    return None
+                stop_distance = distances[0]
             
             # Calculate stop loss price
             if order_type == "buy":
@@ -712,23 +996,22 @@ class MarketSessionTrader:
             return stop_loss
             
         except Exception as e:
-            logging.error(f"Error calculating ATR-based stop loss for {symbol}: {str(e)}")
+            logger.error(f"Error calculating ATR-based stop loss for {symbol}: {str(e)}")
             return None
 
-    def get_atr_based_take_profit(self, symbol: str, entry_price: float, order_type: str, atr_multiplier: float = 1.0) -> float:
-        """Calculate take profit based on ATR"""
+    def get_atr_based_take_profit(self, symbol: str, entry_price: float, order_type: str, atr_multiplier: float = 1.0,
+                                  tp_distance: float = None) -> float:
+        """Calculate take profit based on ATR, or on a distance already taken from _atr_distances"""
         try:
             symbol_info = self.get_symbol_info(symbol)
             if not symbol_info:
                 return None
-                
-            # Get daily ATR
-            atr = self.calculate_daily_atr(symbol)
-            if not atr:
-                return None
-                
-            # Calculate take profit distance using ATR
-            tp_distance = atr * atr_multiplier
+            
+            if tp_distance is None:
+                distances = self._atr_distances(symbol, atr_multiplier)
+                if not distances:
+                    return None
+                tp_distance = distances[1]
             
             # Calculate take profit price
             if order_type == "buy":
@@ -739,7 +1022,7 @@ class MarketSessionTrader:
             return take_profit
             
         except Exception as e:
-            logging.error(f"Error calculating ATR-based take profit for {symbol}: {str(e)}")
+            logger.error(f"Error calculating ATR-based take profit for {symbol}: {str(e)}")
             return None
 
     def calculate_order_levels(self, symbol: str, current_price: float, order_type: str, candle: Dict) -> Tuple[float, float]:
@@ -748,36 +1031,21 @@ class MarketSessionTrader:
             symbol_info = self.get_symbol_info(symbol)
             if not symbol_info:
                 return None, None
-                
-            pip_value = 0.0001 if not "JPY" in symbol else 0.01
-            
-            # Calculate minimum distance based on spread
-            min_distance = symbol_info['spread'] * self.min_spread_multiplier
-            
-            # Use candle range for dynamic entry distances
-            candle_range = candle['range']
-            volatility_mult = 1.2 if "JPY" in symbol else 1.0
             
-            # Scale entry distances based on candle range and volatility
-            base_distance = max(
-                self.base_entry_pips * pip_value,
-                candle_range * 0.1  # 10% of candle range
-            ) * volatility_mult * self.scalp_multiplier
+            levels = self._level_calculators.get((symbol, order_type))
+            if levels is None:
+                levels = _make_level_calculator(
+                    self._pip[symbol], self._vol_mult[symbol], self.base_entry_pips,
+                    self.scalp_multiplier, symbol_info['digits'], order_type == "buy"
+                )
+                self._level_calculators[(symbol, order_type)] = levels
             
-            # Ensure distance is not smaller than minimum spread-based distance
-            entry_distance = max(base_distance, min_distance)
-            
-            if order_type == "buy":
-                limit_price = round(current_price - entry_distance, symbol_info['digits'])
-                stop_price = round(current_price + entry_distance, symbol_info['digits'])
-            else:  # sell
-                limit_price = round(current_price + entry_distance, symbol_info['digits'])
-                stop_price = round(current_price - entry_distance, symbol_info['digits'])
-                
-            return limit_price, stop_price
+            # The spread moves tick to tick, so the minimum distance is passed per call
+            min_distance = symbol_info['spread'] * self.min_spread_multiplier
+            return levels(current_price, candle['range'], min_distance)
             
         except Exception as e:
-            logging.error(f"Error calculating order levels for {symbol}: {str(e)}")
+            logger.error(f"Error calculating order levels for {symbol}: {str(e)}")
             return None, None
 
     def calculate_trailing_stop(self, symbol: str, candle: Dict, order_type: str, entry_price: float) -> float:
@@ -788,7 +1056,7 @@ class MarketSessionTrader:
                 return None
                 
             candle_range = candle['range']
-            pip_value = 0.0001 if not "JPY" in symbol else 0.01
+            pip_value = self._pip[symbol]
             
             # Minimum trailing stop based on spread
             min_trailing_distance = symbol_info['spread'] * self.min_spread_multiplier
@@ -805,7 +1073,7 @@ class MarketSessionTrader:
             return trailing_stop
             
         except Exception as e:
-            logging.error(f"Error calculating trailing stop for {symbol}: {str(e)}")
+            logger.error(f"Error calculating trailing stop for {symbol}: {str(e)}")
             return None
 
     def get_session_volatility_multiplier(self, active_sessions: List[Tuple[str, Dict]]) -> float:
@@ -819,246 +1087,199 @@ class MarketSessionTrader:
         
         return max_volatility
 
-    def place_direct_market_order(self, symbol: str, order_type: str, volatility_mult: float):
-        """Place direct market order with automatic stop loss and take profit"""
-        try:
-            if not self.verify_symbol(symbol):
-                return
-                
-            # Get current price
-            tick = mt5.symbol_info_tick(symbol)
-            if not tick:
-                logging.error(f"Failed to get tick data for {symbol}")
-                return
-                
-            current_price = tick.ask if order_type == "buy" else tick.bid
-            
-            # Calculate ATR-based stop loss and take profit
-            sl = self.get_atr_based_stop_loss(symbol, current_price, order_type, atr_multiplier=0.30 * volatility_mult)
-            tp = self.get_atr_based_take_profit(symbol, current_price, order_type, atr_multiplier=0.30 * volatility_mult)
-            
-            if not sl or not tp:
-                logging.error(f"Failed to calculate SL/TP levels for {symbol}")
-                return
-            
-            # Generate timestamp for order comments
-            now = datetime.datetime.now()
-            minutes_since_midnight = int((now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds() / 60)
-            
-            # Create direct market order
-            if order_type == "buy":
-                order_request = {
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": symbol,
-                    "volume": self.volume,
-                    "type": mt5.ORDER_TYPE_BUY,
-                    "price": current_price,
-                    "sl": sl,
-                    "tp": tp,
-                    "deviation": 10,
-                    "magic": 123456,
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                    "comment": f"DM{minutes_since_midnight}"
-                }
-            else:  # sell
-                order_request = {
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": symbol,
-                    "volume": self.volume,
-                    "type": mt5.ORDER_TYPE_SELL,
-                    "price": current_price,
-                    "sl": sl,
-                    "tp": tp,
-                    "deviation": 10,
-                    "magic": 123456,
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                    "comment": f"DM{minutes_since_midnight}"
-                }
+    def place_direct_market_order(self, symbol: str, order_type: str, volatility_mult: float, now: datetime.datetime = None,
+                                  tick=None) -> bool:
+        """Place direct market order with automatic stop loss and take profit; True if MT5 accepted it"""
+        if not self.verify_symbol(symbol):
+            return False
+        return self._send_direct_market_order(symbol, order_type, volatility_mult, now, tick)
+
+    def _send_direct_market_order(self, symbol: str, order_type: str, volatility_mult: float,
+                                  now: datetime.datetime = None, tick=None) -> bool:
+        """place_direct_market_order for a symbol the caller has already verified"""
+        # Get current price, unless the caller already fetched this tick's quote
+        tick = tick or mt5.symbol_info_tick(symbol)
+        if not tick:
+            logger.error("Failed to get tick data for %s", symbol)
+            return False
             
-            # Send the order
-            if self.send_order(order_request):
-                logging.info(f"Direct market {order_type} order placed for {symbol} at {current_price}, SL: {sl}, TP: {tp}")
-            else:
-                logging.error(f"Failed to place direct market {order_type} order for {symbol}")
-                
-        except Exception as e:
-            logging.error(f"Error placing direct market order for {symbol}: {str(e)}")
+        current_price = tick.ask if order_type == "buy" else tick.bid
+        
+        # Calculate ATR-based stop loss and take profit from one ATR lookup
+        distances = self._atr_distances(symbol, _SL_TP_ATR_FRACTION * volatility_mult)
+        if not distances:
+            logger.error("Failed to calculate SL/TP levels for %s", symbol)
+            return False
+        sl_distance, tp_distance = distances
+        sl = self.get_atr_based_stop_loss(symbol, current_price, order_type, stop_distance=sl_distance)
+        tp = self.get_atr_based_take_profit(symbol, current_price, order_type, tp_distance=tp_distance)
+        
+        if not sl or not tp:
+            logger.error("Failed to calculate SL/TP levels for %s", symbol)
+            return False
+        
+        # Generate timestamp for order comments
+        minutes_since_midnight = _local_minute_of_day(now or datetime.datetime.now(UTC))
+        
+        # Create direct market order
+        order_request = {
+            **_MARKET_ORDER_BASE,
+            "symbol": symbol,
+            "volume": self.volume,
+            "type": _MARKET_ORDER_TYPES[order_type],
+            "price": current_price,
+            "sl": sl,
+            "tp": tp,
+            "comment": f"DM{minutes_since_midnight}"
+        }
+        
+        # Send the order
+        if not self.send_order(order_request):
+            logger.error("Failed to place direct market %s order for %s", order_type, symbol)
+            return False
+        logger.info("Direct market %s order placed for %s at %s, SL: %s, TP: %s", order_type, symbol, current_price, sl, tp)
+        return True
 
-    def place_pending_orders(self, symbol: str, order_type: str):
-        """Place pending orders for scalping or direct market orders for single position mode"""
-        try:
-            if not self.verify_symbol(symbol):
-                return
-                
-            # Clean expired orders first
-            self.clean_expired_orders(symbol)
+    def place_pending_orders(self, symbol: str, order_type: str, volatility_mult: float = None, now: datetime.datetime = None,
+                             tick=None) -> bool:
+        """Place pending orders for scalping or direct market orders for single position mode;
+        True if MT5 accepted at least one order"""
+        if not self.verify_symbol(symbol):
+            return False
+        
+        now = now or datetime.datetime.now(UTC)
             
-            # Get active sessions for volatility adjustment
-            active_sessions = self.get_active_sessions()
+        # Clean expired orders first
+        self.clean_expired_orders(symbol, now)
+        
+        # Get active sessions for volatility adjustment, unless the caller already has it
+        if volatility_mult is None:
+            active_sessions = self.get_active_sessions(now)
             volatility_mult = self.get_session_volatility_multiplier(active_sessions)
+        
+        current_positions = self.get_positions_count(symbol, order_type)
+        
+        if current_positions >= self.max_positions:
+            logger.info("Maximum positions reached for %s %s", symbol, order_type)
+            return False
             
-            current_positions = self.get_positions_count(symbol, order_type)
-            
-            if current_positions >= self.max_positions:
-                logging.info(f"Maximum positions reached for {symbol} {order_type}")
-                return
-                
-            # Check if we should place direct market orders (when max_positions = 1)
-            if self.max_positions == 1:
-                self.place_direct_market_order(symbol, order_type, volatility_mult)
-                return
-                
-            # Get current price and candle data
-            tick = mt5.symbol_info_tick(symbol)
-            if not tick:
-                logging.error(f"Failed to get tick data for {symbol}")
-                return
-                
-            current_price = tick.ask if order_type == "buy" else tick.bid
-            candle = self.get_30m_candle(symbol)
-            
-            if not candle:
-                logging.error(f"Failed to get candle data for {symbol}")
-                return
-                
-            # Adjust candle range based on session volatility
-            candle['range'] = candle['range'] * volatility_mult
+        # Check if we should place direct market orders (when max_positions = 1)
+        if self.max_positions == 1:
+            return self._send_direct_market_order(symbol, order_type, volatility_mult, now, tick)
             
-            limit_price, stop_price = self.calculate_order_levels(symbol, current_price, order_type, candle)
-            if not limit_price or not stop_price:
-                return
+        # Get current price and candle data
+        tick = tick or mt5.symbol_info_tick(symbol)
+        if not tick:
+            logger.error("Failed to get tick data for %s", symbol)
+            return False
             
-            # Generate timestamp for order comments
-            now = datetime.datetime.now()
-            minutes_since_midnight = int((now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds() / 60)
+        current_price = tick.ask if order_type == "buy" else tick.bid
+        candle = self.get_30m_candle(symbol)
+        
+        if not candle:
+            logger.error("Failed to get candle data for %s", symbol)
+            return False
             
-            orders = []
-            if order_type == "buy":
-                # Calculate ATR-based stop losses and take profits with volatility adjustment
-                limit_sl = self.get_atr_based_stop_loss(symbol, limit_price, "buy", atr_multiplier=0.30 * volatility_mult)
-                stop_sl = self.get_atr_based_stop_loss(symbol, stop_price, "buy", atr_multiplier=0.30 * volatility_mult)
-                limit_tp = self.get_atr_based_take_profit(symbol, limit_price, "buy", atr_multiplier=0.30 * volatility_mult)
-                stop_tp = self.get_atr_based_take_profit(symbol, stop_price, "buy", atr_multiplier=0.30 * volatility_mult)
-                
-                if not all([limit_sl, stop_sl, limit_tp, stop_tp]):
-                    logging.error(f"Failed to calculate SL/TP levels for {symbol}")
-                    return
-                
-                # Buy Limit order
-                buy_limit = {
-                    "action": mt5.TRADE_ACTION_PENDING,
-                    "symbol": symbol,
-                    "volume": self.volume,
-                    "type": mt5.ORDER_TYPE_BUY_LIMIT,
-                    "price": limit_price,
-                    "sl": limit_sl,
-                    "tp": limit_tp,
-                    "deviation": 10,
-                    "magic": 123456,
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                    "comment": f"S{minutes_since_midnight}"
-                }
-                orders.append(buy_limit)
-                
-                # Buy Stop order
-                buy_stop = {
-                    "action": mt5.TRADE_ACTION_PENDING,
-                    "symbol": symbol,
-                    "volume": self.volume,
-                    "type": mt5.ORDER_TYPE_BUY_STOP,
-                    "price": stop_price,
-                    "sl": stop_sl,
-                    "tp": stop_tp,
-                    "deviation": 10,
-                    "magic": 123456,
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                    "comment": f"S{minutes_since_midnight}"
-                }
-                orders.append(buy_stop)
-            else:
-                # Calculate ATR-based stop losses and take profits with volatility adjustment
-                limit_sl = self.get_atr_based_stop_loss(symbol, limit_price, "sell", atr_multiplier=0.30 * volatility_mult)
-                stop_sl = self.get_atr_based_stop_loss(symbol, stop_price, "sell", atr_multiplier=0.30 * volatility_mult)
-                limit_tp = self.get_atr_based_take_profit(symbol, limit_price, "sell", atr_multiplier=0.30 * volatility_mult)
-                stop_tp = self.get_atr_based_take_profit(symbol, stop_price, "sell", atr_multiplier=0.30 * volatility_mult)
-                
-                if not all([limit_sl, stop_sl, limit_tp, stop_tp]):
-                    logging.error(f"Failed to calculate SL/TP levels for {symbol}")
-                    return
-                
-                # Sell Limit order
-                sell_limit = {
-                    "action": mt5.TRADE_ACTION_PENDING,
-                    "symbol": symbol,
-                    "volume": self.volume,
-                    "type": mt5.ORDER_TYPE_SELL_LIMIT,
-                    "price": limit_price,
-                    "sl": limit_sl,
-                    "tp": limit_tp,
-                    "deviation": 10,
-                    "magic": 123456,
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                    "comment": f"S{minutes_since_midnight}"
-                }
-                orders.append(sell_limit)
-                
-                # Sell Stop order
-                sell_stop = {
-                    "action": mt5.TRADE_ACTION_PENDING,
-                    "symbol": symbol,
-                    "volume": self.volume,
-                    "type": mt5.ORDER_TYPE_SELL_STOP,
-                    "price": stop_price,
-                    "sl": stop_sl,
-                    "tp": stop_tp,
-                    "deviation": 10,
-                    "magic": 123456,
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                    "comment": f"S{minutes_since_midnight}"
-                }
-                orders.append(sell_stop)
-
-            # Send orders
-            for order in orders:
-                if self.get_positions_count(symbol, order_type) < self.max_positions:
-                    self.send_order(order)
-                    
-        except Exception as e:
-            logging.error(f"Error placing orders for {symbol}: {str(e)}")
+        # Adjust candle range based on session volatility
+        candle['range'] = candle['range'] * volatility_mult
+        
+        limit_price, stop_price = self.calculate_order_levels(symbol, current_price, order_type, candle)
+        if not limit_price or not stop_price:
+            return False
+        
+        # One ATR lookup serves all four SL/TP levels below
+        distances = self._atr_distances(symbol, _SL_TP_ATR_FRACTION * volatility_mult)
+        if not distances:
+            logger.error("Failed to calculate SL/TP levels for %s", symbol)
+            return False
+        sl_distance, tp_distance = distances
+        
+        # Generate timestamp for order comments
+        minutes_since_midnight = _local_minute_of_day(now)
+        placed_at = int(now.timestamp())
+        
+        # A batch with this comment already went out this minute; wait for the next minute to add more
+        batch_key = (symbol, order_type, minutes_since_midnight)
+        if current_positions > 0 and batch_key in self._recent_batches:
+            return False
+        
+        # Calculate ATR-based stop losses and take profits with volatility adjustment
+        limit_sl = self.get_atr_based_stop_loss(symbol, limit_price, order_type, stop_distance=sl_distance)
+        stop_sl = self.get_atr_based_stop_loss(symbol, stop_price, order_type, stop_distance=sl_distance)
+        limit_tp = self.get_atr_based_take_profit(symbol, limit_price, order_type, tp_distance=tp_distance)
+        stop_tp = self.get_atr_based_take_profit(symbol, stop_price, order_type, tp_distance=tp_distance)
+        
+        if not all([limit_sl, stop_sl, limit_tp, stop_tp]):
+            logger.error("Failed to calculate SL/TP levels for %s", symbol)
+            return False
+        
+        limit_type, stop_type = _PENDING_ORDER_TYPES[order_type]
+        
+        # Fields shared by the limit and stop order; magic is the placement time, read back by clean_expired_orders
+        base = {
+            **_PENDING_ORDER_BASE,
+            "symbol": symbol,
+            "volume": self.volume,
+            "magic": placed_at,
+            "comment": f"S{minutes_since_midnight}"
+        }
+        orders = [
+            {**base, "type": limit_type, "price": limit_price, "sl": limit_sl, "tp": limit_tp},
+            {**base, "type": stop_type, "price": stop_price, "sl": stop_sl, "tp": stop_tp},
+        ]
+
+        # Send orders; each accepted order counts toward max_positions like the ones counted above.
+        # Kept sequential: symbols already overlap on the pool, and order_send is serialized anyway
+        placed = False
+        for order in orders:
+            if current_positions >= self.max_positions:
+                break
+            if self.send_order(order):
+                current_positions += 1
+                placed = True
+        if placed:
+            self._recent_batches.add(batch_key)
+        return placed
 
     def run(self):
         """Main trading loop"""
         try:
             self.initialize_mt5()
             
+            # Monotonic clock so wall-clock adjustments cannot stall or rush the checks;
+            # the first check runs straight away
+            self.last_session_check = time.monotonic() - self.session_check_interval
+            self._last_heartbeat = time.monotonic()
+            
             while True:
                 try:
-                    current_time = time.time()
+                    current_time = time.monotonic()
                     
                     # Check sessions periodically
                     if current_time - self.last_session_check >= self.session_check_interval:
+                        # A dead terminal would fail every RPC of the check; reconnect first
+                        self._check_connection()
                         self.manage_session_orders()
                         self.last_session_check = current_time
                     
-                    time.sleep(1)  # Prevent CPU overuse
+                    # Sleep until the next check is due instead of waking every second
+                    sleep_for = self.session_check_interval - (time.monotonic() - self.last_session_check)
+                    if sleep_for > 0:
+                        time.sleep(min(sleep_for, _MAX_IDLE_SLEEP))
                     
                 except Exception as e:
-                    logging.error(f"Error in trading loop: {str(e)}")
+                    logger.error(f"Error in trading loop: {str(e)}")
                     time.sleep(5)  # Wait before retrying
                     
         except KeyboardInterrupt:
-            logging.info("Trading bot stopped by user")
+            logger.info("Trading bot stopped by user")
             self.update_bot_status(False, "Trading bot stopped by user")
         except Exception as e:
-            logging.error(f"Fatal error in trading bot: {str(e)}")
+            logger.error(f"Fatal error in trading bot: {str(e)}")
             self.update_bot_status(False, f"Fatal error: {str(e)}")
         finally:
+            self._symbol_pool.shutdown(wait=True)
+            self.close_db_connection()
             if self.initialized:
                 mt5.shutdown()
                 self.update_bot_status(False, "MT5 connection closed")
@@ -153,19 +153,29 @@ class TradingConfig:
 
         updated_keys = []
         for key, attr in self._config_fields.items():
-            if key in updates and updates[key] is not None:
-                current_value = getattr(self, attr)
-                updated_value = type(current_value)(updates[key])
-                if updated_value != current_value:
-                    setattr(self, attr, updated_value)
-                    updated_keys.append(key)
+            raw = updates.get(key)
+            if raw is None:
+                continue
+            current_value = getattr(self, attr)
+            # The dashboard resends the full config, so most values arrive unchanged
+            if raw == current_value:
+                continue
+            updated_value = type(current_value)(raw)
+            if updated_value != current_value:
+                setattr(self, attr, updated_value)
+                updated_keys.append(key)
 
         category_updates = {}
         for category in CATEGORY_NAMES:
+            current_targets = self.category_targets.get(category, {})
             for field in TARGET_FIELDS:
                 key = f"{field}_{category}"
-                if key in updates and updates[key] is not None:
-                    category_updates.setdefault(category, {})[field] = float(updates[key])
+                raw = updates.get(key)
+                if raw is None:
+                    continue
+                updated_value = float(raw)
+                if updated_value != current_targets.get(field):
+                    category_updates.setdefault(category, {})[field] = updated_value
                     updated_keys.append(key)
 
         if category_updates:
@@ -176,80 +186,102 @@ class TradingConfig:
         return updated_keys
 
 class ProgressIndicator:
+    # Green for positive, red for negative, default color for zero
+    _FMT_POS = "\033[32m%+.2f %s\033[0m"
+    _FMT_NEG = "\033[31m%.2f %s\033[0m"
+    _FMT_ZERO = "%.2f %s"
+
     def __init__(self, config: ProgressIndicatorConfig):
         self.config = config
         self.count = 0
         self.last_newline = 0
         self.last_total_profit = 0.0
-        self.last_pair_profits = defaultdict(float)
-
-    def _should_show_profit(self, current_profit: float, last_profit: float) -> bool:
+        self.last_pair_profits: Dict[str, float] = {}  # read with .get so unseen pairs are not inserted
+        self._dots_pending = 0  # dots not yet written; emitted with the next line
+        self._ts_second = -1
+        self._ts_text = ''
+
+    def _timestamp(self) -> str:
+        """Local HH:MM:SS, formatted at most once per wall-clock second."""
+        second = int(time.time())
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_text = time.strftime('%H:%M:%S', time.localtime(second))
+        return self._ts_text
+
+    def _should_show_profit(self, current_profit: float, last_profit: float, interval_tick: bool) -> bool:
         """Determine if profit should be shown based on minimum change threshold."""
-        return (abs(current_profit - last_profit) >= self.config.profit_display.min_profit_change
-                or self.count % self.config.interval == 0)
-
-    def _get_profit_trend(self, current_profit: float, last_profit: float) -> str:
-        """Get trend indicator for profit change."""
-        if abs(current_profit - last_profit) < self.config.profit_display.min_profit_change:
-            return DisplaySymbols.PROFIT_UNCHANGED
-        return DisplaySymbols.PROFIT_UP if current_profit > last_profit else DisplaySymbols.PROFIT_DOWN
+        return interval_tick or abs(current_profit - last_profit) >= self.config.profit_display.min_profit_change
 
     def format_profit(self, profit: float, last_profit: float = 0.0) -> str:
         """Format profit with color and trend indicator."""
-        trend = self._get_profit_trend(profit, last_profit)
+        if abs(profit - last_profit) < self.config.profit_display.min_profit_change:
+            trend = DisplaySymbols.PROFIT_UNCHANGED
+        else:
+            trend = DisplaySymbols.PROFIT_UP if profit > last_profit else DisplaySymbols.PROFIT_DOWN
         if profit > 0:
-            return f"\033[32m{profit:+.2f} {trend}\033[0m"  # Green for positive
+            template = self._FMT_POS
         elif profit < 0:
-            return f"\033[31m{profit:.2f} {trend}\033[0m"   # Red for negative
-        return f"{profit:.2f} {trend}"                      # Default color for zero
+            template = self._FMT_NEG
+        else:
+            template = self._FMT_ZERO
+        return template % (profit, trend)
 
     def update(self, pair_profits: Dict[str, float], total_profit: float) -> None:
         if not self.config.enabled:
             return
             
         self.count += 1
+        interval = self.config.interval
+        interval_tick = self.count % interval == 0
         show_profits = False
+        changed_pairs = []
         
         # Check if we should show profits
         if self.config.profit_display.enabled:
             show_total = (self.config.profit_display.show_total and 
-                         self._should_show_profit(total_profit, self.last_total_profit))
+                         self._should_show_profit(total_profit, self.last_total_profit, interval_tick))
             
-            show_pairs = self.config.profit_display.show_pairs and any(
-                self._should_show_profit(curr_profit, self.last_pair_profits[pair])
-                for pair, curr_profit in pair_profits.items()
-            )
+            # Pairs worth showing, found in one pass and reused for the output below
+            if self.config.profit_display.show_pairs:
+                changed_pairs = [
+                    (pair, profit) for pair, profit in pair_profits.items()
+                    if self._should_show_profit(profit, self.last_pair_profits.get(pair, 0.0), interval_tick)
+                ]
             
-            show_profits = show_total or show_pairs or self.count % self.config.interval == 0
+            show_profits = show_total or bool(changed_pairs) or interval_tick
         
-        # Print progress dot
-        print(self.config.symbol, end='', flush=True)
+        # Progress dots are buffered and written together with the next line
+        self._dots_pending += 1
         
         # Show profits if needed
         if show_profits:
-            timestamp = datetime.now().strftime('%H:%M:%S')
+            timestamp = self._timestamp()
             profit_str = []
             
             if self.config.profit_display.show_total:
                 profit_str.append(f"Total: {self.format_profit(total_profit, self.last_total_profit)}")
             
-            if self.config.profit_display.show_pairs:
-                pair_profits_str = [
-                    f"{pair}: {self.format_profit(profit, self.last_pair_profits[pair])}"
-                    for pair, profit in sorted(pair_profits.items())
-                    if self._should_show_profit(profit, self.last_pair_profits[pair])
-                ]
-                if pair_profits_str:
-                    profit_str.extend(pair_profits_str)
+            if changed_pairs:
+                profit_str.extend(
+                    f"{pair}: {self.format_profit(profit, self.last_pair_profits.get(pair, 0.0))}"
+                    for pair, profit in sorted(changed_pairs)
+                )
             
-            print(f" [{timestamp}] {' | '.join(profit_str)}")
+            self._write_line(f" [{timestamp}] {' | '.join(profit_str)}")
             self.last_newline = self.count
             self.last_total_profit = total_profit
             self.last_pair_profits.update(pair_profits)
-        elif self.count - self.last_newline >= self.config.interval:
-            print(f" [{datetime.now().strftime('%H:%M:%S')}]")
+        elif self.count - self.last_newline >= interval:
+            self._write_line(f" [{self._timestamp()}]")
             self.last_newline = self.count
 
+    def _write_line(self, line: str) -> None:
+        """Write the pending progress dots and a status line in a single flush."""
+        sys.stdout.write(f"{self.config.symbol * self._dots_pending}{line}\n")
+        sys.stdout.flush()
+        self._dots_pending = 0
+
 def setup_logging(config: LoggingConfig) -> None:
     """Configure logging based on config settings."""
     logging.basicConfig(
@@ -301,14 +333,16 @@ class ProfitMonitor:
     def __init__(self, config: TradingConfig):
         self.config = config
         self.connection_manager = MT5ConnectionManager(config)
-        self.pair_profits: Dict[str, List[Tuple[int, float]]] = {}
+        self.pair_profits: Dict[str, float] = {}  # symbol -> summed profit of its open positions
         self.total_profit: float = 0.0
         self.progress = ProgressIndicator(config.logging.progress_indicator)
         self.config_manager = config.config_manager
         self.config_signal_file = os.path.join(project_root, 'config', 'config_changed.signal')
-        self.last_config_check = 0
+        self.last_config_check = 0.0  # time.monotonic() of the last check
         self.config_check_interval = 3
+        self._last_signal_mtime = 0.0
         self._symbol_category_cache: Dict[str, str] = {}
+        self._close_template = self._build_close_template()
 
     def _get_symbol_category(self, symbol: str) -> str:
         cached = self._symbol_category_cache.get(symbol)
@@ -342,24 +376,30 @@ class ProfitMonitor:
     def reload_config_if_changed(self) -> bool:
         """Reload profit scouting config when the dashboard signals changes."""
         try:
-            current_time = time.time()
-            if current_time - self.last_config_check < self.config_check_interval:
+            check_time = time.monotonic()
+            if check_time - self.last_config_check < self.config_check_interval:
                 return False
 
-            self.last_config_check = current_time
+            self.last_config_check = check_time
 
-            if not os.path.exists(self.config_signal_file):
+            try:
+                signal_mtime = os.stat(self.config_signal_file).st_mtime
+            except FileNotFoundError:
                 return False
 
-            signal_mtime = os.path.getmtime(self.config_signal_file)
-            if current_time - signal_mtime >= 60:
+            # A signal we already applied (e.g. one we could not remove) is not re-read
+            # Signal freshness is judged against the wall clock, like the file mtime
+            if signal_mtime == self._last_signal_mtime or time.time() - signal_mtime >= 60:
                 return False
+            self._last_signal_mtime = signal_mtime
 
             updates = self.config_manager.get_profit_scouting_config()
             updates = {k: v for k, v in updates.items() if k != '_metadata'}
             changed_keys = self.config.apply_runtime_updates(updates)
             if changed_keys:
                 logger.info("Profit scouting config updated: %s", ", ".join(changed_keys))
+                # Deviation and magic number are baked into the close template
+                self._close_template = self._build_close_template()
 
             try:
                 os.remove(self.config_signal_file)
@@ -378,16 +418,10 @@ class ProfitMonitor:
             logger.error(f"Error getting open positions: {e}")
             return None
 
-    def create_close_request(self, position: Any) -> Dict[str, Any]:
-        """Create a standardized order request for closing a position."""
+    def _build_close_template(self) -> Dict[str, Any]:
+        """Close request fields that are the same for every position."""
         return {
             "action": MT5ReturnCode.TRADE_ACTION_DEAL,
-            "position": position.ticket,
-            "symbol": position.symbol,
-            "volume": position.volume,
-            "type": (MT5ReturnCode.ORDER_TYPE_SELL 
-                    if position.type == MT5ReturnCode.ORDER_TYPE_BUY 
-                    else MT5ReturnCode.ORDER_TYPE_BUY),
             "deviation": self.config.order_deviation,
             "magic": self.config.magic_number,
             "comment": "Auto Close",
@@ -395,24 +429,44 @@ class ProfitMonitor:
             "type_filling": self.config.order_filling_type.value,
         }
 
+    def create_close_request(self, position: Any) -> Dict[str, Any]:
+        """Create a standardized order request for closing a position."""
+        request = self._close_template.copy()
+        request["position"] = position.ticket
+        request["symbol"] = position.symbol
+        request["volume"] = position.volume
+        request["type"] = (MT5ReturnCode.ORDER_TYPE_SELL
+                           if position.type == MT5ReturnCode.ORDER_TYPE_BUY
+                           else MT5ReturnCode.ORDER_TYPE_BUY)
+        return request
+
     def close_position(self, ticket: int) -> bool:
         try:
             position = mt5.positions_get(ticket=ticket)
             if not position:
-                logger.warning(f"Position {ticket} not found")
+                logger.warning("Position %s not found", ticket)
                 return False
+        except Exception as e:
+            logger.error("Error closing position %s: %s", ticket, e)
+            return False
 
-            request = self.create_close_request(position[0])
+        return self._close_position_obj(position[0])
+
+    def _close_position_obj(self, position: Any) -> bool:
+        """Close a position already read from MT5, without fetching it again."""
+        ticket = position.ticket
+        try:
+            request = self.create_close_request(position)
             result = mt5.order_send(request)
             
             if result and result.retcode == MT5ReturnCode.TRADE_RETCODE_DONE:
-                logger.info(f"Successfully closed position {ticket}")
+                logger.info("Successfully closed position %s", ticket)
                 return True
             else:
-                logger.error(f"Failed to close position {ticket}: {result.comment if result else 'Unknown error'}")
+                logger.error("Failed to close position %s: %s", ticket, result.comment if result else 'Unknown error')
                 return False
         except Exception as e:
-            logger.error(f"Error closing position {ticket}: {e}")
+            logger.error("Error closing position %s: %s", ticket, e)
             return False
 
     def process_positions(self) -> None:
@@ -425,42 +479,49 @@ class ProfitMonitor:
             self.progress.update({}, 0.0)  # Update with no positions
             return
 
-        # Reset profit tracking
-        self.pair_profits.clear()
-        current_pair_profits = defaultdict(float)
+        # Per-symbol state as parallel lists: (positions, profits, category)
+        pair_state: Dict[str, Tuple[List[Any], List[float], str]] = {}
         category_profits = defaultdict(float)
-        symbol_categories: Dict[str, str] = {}
-        positions_to_close = set()  # Track positions that should be closed
+        positions_to_close: Dict[int, Any] = {}  # ticket -> position, closed without a second lookup
+        records = []  # (position, ticket, profit, symbol, category) read once per position
         
-        # First pass: Calculate all profits and identify positions to close
+        # Single pass over the positions: aggregate profits and keep the fields the checks need
         for pos in positions:
             symbol = pos.symbol
             profit = pos.profit
             ticket = pos.ticket
             
-            # Track profits
-            if symbol not in self.pair_profits:
-                self.pair_profits[symbol] = []
-            self.pair_profits[symbol].append((ticket, profit))
-            current_pair_profits[symbol] += profit
-            if symbol not in symbol_categories:
-                symbol_categories[symbol] = self._get_symbol_category(symbol)
-            category_profits[symbol_categories[symbol]] += profit
+            # Track profits with a single lookup per position
+            state = pair_state.get(symbol)
+            if state is None:
+                state = pair_state[symbol] = ([], [], self._get_symbol_category(symbol))
+            state[0].append(pos)
+            state[1].append(profit)
+            category = state[2]
+            category_profits[category] += profit
+            records.append((pos, ticket, profit, symbol, category))
             
-        # Calculate total profit
-        self.total_profit = sum(profit for symbol_profit in current_pair_profits.values() for profit in [symbol_profit])
+        # Calculate pair and total profit
+        self.pair_profits = {symbol: sum(profits) for symbol, (_, profits, _) in pair_state.items()}
+        self.total_profit = sum(self.pair_profits.values())
         
-        # Check all conditions and mark positions for closing
-        for pos in positions:
-            symbol = pos.symbol
-            profit = pos.profit
-            ticket = pos.ticket
-            category = symbol_categories.get(symbol, 'currency')
+        # Targets and the total-profit check only vary by category, so settle them once per category
+        by_category = self.config.profit_targets_mode == 'by_category'
+        category_checks = {}
+        for category in category_profits:
             targets = self._get_target_set(category)
+            total_profit_check = category_profits[category] if by_category else self.total_profit
+            category_checks[category] = (targets, total_profit_check,
+                                         total_profit_check >= targets['total_target_profit'])
+        
+        # Check all conditions and mark positions for closing
+        pairs_checked = set()  # a pair's target is evaluated once, not once per position
+        for pos, ticket, profit, symbol, category in records:
+            targets, total_profit_check, total_target_met = category_checks[category]
             
             # Check individual position profit target
             if profit >= targets['target_profit_position']:
-                positions_to_close.add(ticket)
+                positions_to_close[ticket] = pos
                 logger.info(
                     "Position %s marked for closing (%s): individual profit target met (%.2f >= %.2f)",
                     ticket,
@@ -470,25 +531,25 @@ class ProfitMonitor:
                 )
             
             # Check pair profit target
-            pair_profit = current_pair_profits[symbol]
-            if pair_profit >= targets['target_profit_pair']:
+            pair_profit = self.pair_profits[symbol]
+            if symbol not in pairs_checked and pair_profit >= targets['target_profit_pair']:
                 # Mark all positions of this pair for closing
-                for pair_ticket, _ in self.pair_profits[symbol]:
-                    positions_to_close.add(pair_ticket)
+                for pair_pos in pair_state[symbol][0]:
+                    positions_to_close[pair_pos.ticket] = pair_pos
                     logger.info(
                         "Position %s marked for closing (%s): pair profit target met (%.2f >= %.2f)",
-                        pair_ticket,
+                        pair_pos.ticket,
                         category,
                         pair_profit,
                         targets['target_profit_pair']
                     )
+            pairs_checked.add(symbol)
             
             # Check total profit target
-            total_profit_check = self.total_profit if self.config.profit_targets_mode != 'by_category' else category_profits[category]
-            if total_profit_check >= targets['total_target_profit']:
+            if total_target_met:
                 # Mark all positions for closing when they're profitable
                 if profit > 0:
-                    positions_to_close.add(ticket)
+                    positions_to_close[ticket] = pos
                     logger.info(
                         "Position %s marked for closing (%s): total profit target met (%.2f >= %.2f)",
                         ticket,
@@ -498,26 +559,34 @@ class ProfitMonitor:
                     )
         
         # Close all marked positions
-        for ticket in positions_to_close:
-            if self.close_position(ticket):
-                logger.info(f"Successfully closed position {ticket}")
+        for ticket, position in positions_to_close.items():
+            if self._close_position_obj(position):
+                logger.info("Successfully closed position %s", ticket)
             else:
-                logger.warning(f"Failed to close position {ticket}")
+                logger.warning("Failed to close position %s", ticket)
         
         # Update progress indicator with current profits
-        self.progress.update(dict(current_pair_profits), self.total_profit)
+        self.progress.update(self.pair_profits, self.total_profit)
 
     def run(self) -> None:
         logger.info("Starting Profit Monitor")
+        reload_config = self.reload_config_if_changed
+        process = self.process_positions
+        sleep = time.sleep
+        # Intervals only change through a config reload, so they are re-read only then
+        check_interval = self.config.check_interval
+        retry_delay = self.config.retry_delay
         try:
             while True:
                 try:
-                    self.reload_config_if_changed()
-                    self.process_positions()
-                    time.sleep(self.config.check_interval)
+                    if reload_config():
+                        check_interval = self.config.check_interval
+                        retry_delay = self.config.retry_delay
+                    process()
+                    sleep(check_interval)
                 except Exception as e:
                     logger.error(f"Error in main loop: {e}")
-                    time.sleep(self.config.retry_delay)
+                    sleep(retry_delay)
         except KeyboardInterrupt:
             logger.info("Shutting down Profit Monitor")
         finally:
@@ -0,0 +1,34 @@
+"""
+Ahead-of-time build of the trading bot kernels
+Run `python -m src.scripts._kernels_aot` once after installing Numba; the compiled
+mst_kernels extension is written next to this file and preferred over the JIT
+"""
+
+import os
+
+
+def atr(high, low, close, period):
+    """Average of the last `period` true ranges over daily high/low/close arrays"""
+    n = high.shape[0]
+    total = 0.0
+    for i in range(n - period, n):
+        tr = high[i] - low[i]
+        if i > 0:
+            tr = max(tr, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        total += tr
+    return total / period
+
+
+def build():
+    """Compile the exported kernels into the mst_kernels extension module"""
+    from numba.pycc import CC
+
+    cc = CC('mst_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    # f8[:] accepts strided views, so rate fields can be passed without copying
+    cc.export('atr', 'f8(f8[:], f8[:], f8[:], i8)')(atr)
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build()
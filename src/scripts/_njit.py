@@ -0,0 +1,16 @@
+"""
+Optional Numba JIT for the trading bot kernels
+Without Numba the decorator is a no-op and kernels run as plain Python
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
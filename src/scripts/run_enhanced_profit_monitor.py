@@ -7,6 +7,7 @@ Runs the enhanced profit monitor with better real-time capabilities
 import os
 import sys
 import logging
+import signal
 from datetime import datetime
 
 # Add project root to Python path
@@ -55,13 +56,25 @@ def main():
             logger.error("Failed to initialize enhanced profit monitor")
             return 1
         
+        def signal_handler(signum, frame):
+            """Handle shutdown signals"""
+            logger.info(f"Received signal {signum}, initiating shutdown...")
+            # Only flag the loop; run_enhanced drains the executors and status writer on exit
+            monitor.stop()
+        
+        # Setup signal handlers for graceful shutdown
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+        
         logger.info("Enhanced Profit Monitor initialized successfully")
         logger.info("Starting real-time monitoring...")
         logger.info("Press Ctrl+C to stop")
         logger.info("")
         
-        # Start enhanced monitoring
+        # Start enhanced monitoring; returns once a shutdown signal has stopped the loop
         monitor.run_enhanced()
+        logger.info("Enhanced Profit Monitor stopped")
+        return 0
         
     except KeyboardInterrupt:
         logger.info("")
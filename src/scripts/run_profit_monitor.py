@@ -66,9 +66,10 @@ class ProfitMonitorService:
             # Print configuration summary
             self._print_config_summary(config)
             
-            # Start monitoring
+            # Start monitoring; returns once a shutdown signal has stopped the loop
             logger.info("Starting monitoring loop...")
             self.monitor.run()
+            self._shutdown()
             
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt")
@@ -81,7 +82,10 @@ class ProfitMonitorService:
         """Handle shutdown signals"""
         logger = logging.getLogger(__name__)
         logger.info(f"Received signal {signum}, initiating shutdown...")
-        self._shutdown()
+        # Only flag the loop here: the writer flush joins a thread that may be
+        # waiting on a lock held by the interrupted main thread
+        if self.monitor:
+            self.monitor.request_stop()
     
     def _shutdown(self):
         """Graceful shutdown"""
@@ -92,7 +96,8 @@ class ProfitMonitorService:
             self.running = False
             
             if self.monitor:
-                # Any cleanup needed for the monitor
+                # Flush queued database writes before exiting (no-op if run() already did)
+                self.monitor.stop_writer()
                 logger.info("Profit monitor cleanup completed")
             
             logger.info("="*60)
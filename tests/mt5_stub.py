@@ -0,0 +1,38 @@
+"""Minimal MetaTrader5 stand-in for tests; the real package only installs on Windows."""
+
+import sys
+import types
+
+# The terminal's own values, so code comparing against them behaves as in production
+CONSTANTS = {
+    "ORDER_TYPE_BUY": 0,
+    "ORDER_TYPE_SELL": 1,
+    "ORDER_TYPE_BUY_LIMIT": 2,
+    "ORDER_TYPE_SELL_LIMIT": 3,
+    "ORDER_TYPE_BUY_STOP": 4,
+    "ORDER_TYPE_SELL_STOP": 5,
+    "POSITION_TYPE_BUY": 0,
+    "POSITION_TYPE_SELL": 1,
+    "TRADE_ACTION_DEAL": 1,
+    "TRADE_ACTION_PENDING": 5,
+    "TRADE_ACTION_REMOVE": 8,
+    "ORDER_TIME_GTC": 0,
+    "ORDER_FILLING_FOK": 0,
+    "ORDER_FILLING_IOC": 1,
+    "ORDER_FILLING_RETURN": 2,
+    "SYMBOL_TRADE_MODE_FULL": 4,
+    "TIMEFRAME_M30": 30,
+    "TIMEFRAME_D1": 16408,
+    "TRADE_RETCODE_DONE": 10009,
+}
+
+
+def install():
+    """Register the stub as MetaTrader5 (once) and return it; tests patch its functions as needed"""
+    mt5 = sys.modules.get("MetaTrader5")
+    if mt5 is None:
+        mt5 = sys.modules["MetaTrader5"] = types.ModuleType("MetaTrader5")
+    for name, value in CONSTANTS.items():
+        if not hasattr(mt5, name):
+            setattr(mt5, name, value)
+    return mt5
@@ -0,0 +1,145 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import mt5_stub
+
+_mt5 = mt5_stub.install()
+
+# The module attaches a file handler under logs/ at import time
+with patch("logging.FileHandler", lambda *args, **kwargs: MagicMock(level=0)):
+    from src.scripts import MarketSessionTradingBot as bot
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _local(hour, minute):
+    """Aware UTC datetime for the given local wall-clock time, as the bot reads comments"""
+    stamp = time.mktime((2026, 1, 2, hour, minute, 0, 0, 0, -1))
+    return datetime.datetime.fromtimestamp(stamp, datetime.UTC)
+
+
+def _order(ticket, comment, magic):
+    return SimpleNamespace(ticket=ticket, comment=comment, magic=magic)
+
+
+def _make_trader(orders, max_positions=3):
+    # Skip __init__: it loads config, starts worker pools and connects to MT5
+    trader = bot.MarketSessionTrader.__new__(bot.MarketSessionTrader)
+    trader.max_positions = max_positions
+    trader.order_expiry_minutes = 30
+    trader.verify_symbol = lambda symbol: True
+    trader._symbol_trades = lambda symbol: ([], orders)
+    trader._mark_symbol_stale = MagicMock()
+    trader.send_order = MagicMock(return_value=True)
+    return trader
+
+
+def _cancelled(trader):
+    return [call.args[0]["order"] for call in trader.send_order.call_args_list]
+
+
+class TestCleanExpiredOrders(unittest.TestCase):
+    def test_orders_with_placement_time_in_magic_expire_by_age(self):
+        now = _local(12, 0)
+        placed = int(now.timestamp())
+        trader = _make_trader([
+            _order(1, "S0700", placed - 31 * 60),
+            _order(2, "S0700", placed - 10 * 60),
+        ])
+
+        trader.clean_expired_orders("EURUSD", now)
+
+        self.assertEqual(_cancelled(trader), [1])
+        request = trader.send_order.call_args[0][0]
+        self.assertEqual((request["action"], request["comment"]), (_mt5.TRADE_ACTION_REMOVE, "Expired order"))
+
+    def test_legacy_magic_orders_still_expire_from_comment(self):
+        now = _local(12, 0)
+        trader = _make_trader([
+            _order(1, "S0675", 123456),  # 11:15, 45 minutes old
+            _order(2, "S0710", 123456),  # 11:50, 10 minutes old
+        ])
+
+        trader.clean_expired_orders("EURUSD", now)
+
+        self.assertEqual(_cancelled(trader), [1])
+
+    def test_legacy_magic_orders_age_across_midnight(self):
+        now = _local(0, 20)
+        trader = _make_trader([
+            _order(1, "S1410", 123456),  # 23:30, 50 minutes old
+            _order(2, "S1430", 123456),  # 23:50, 30 minutes old: not past expiry
+        ])
+
+        trader.clean_expired_orders("EURUSD", now)
+
+        self.assertEqual(_cancelled(trader), [1])
+
+    def test_foreign_and_unparsable_orders_are_left_alone(self):
+        now = _local(12, 0)
+        trader = _make_trader([
+            _order(1, "manual", int(now.timestamp()) - 3600),
+            _order(2, "", 123456),
+            _order(3, "Sxx", 123456),
+        ])
+
+        trader.clean_expired_orders("EURUSD", now)
+
+        trader.send_order.assert_not_called()
+
+    def test_direct_market_mode_skips_cleaning(self):
+        now = _local(12, 0)
+        trader = _make_trader([_order(1, "S0600", 123456)], max_positions=1)
+
+        trader.clean_expired_orders("EURUSD", now)
+
+        trader.send_order.assert_not_called()
+
+
+class _LockCheckingConnection:
+    """Wraps the shared connection and records whether the trader's lock was held on each call"""
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock
+        self.held = []
+
+    def execute(self, *args):
+        self.held.append(self._lock.locked())
+        return self._conn.execute(*args)
+
+
+class TestSharedConnectionLock(unittest.TestCase):
+    def setUp(self):
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        with open(os.path.join(PROJECT_ROOT, "database", "schema.sql")) as f:
+            conn.executescript(f.read())
+        conn.execute(
+            "INSERT INTO trading_sessions (name, start_time, end_time, is_active) VALUES ('Always', '00:00:00', '23:59:59', 1)"
+        )
+        self.addCleanup(conn.close)
+
+        self.trader = bot.MarketSessionTrader.__new__(bot.MarketSessionTrader)
+        self.trader._db_lock = threading.Lock()
+        self.conn = _LockCheckingConnection(conn, self.trader._db_lock)
+        self.trader.get_db_connection = lambda: self.conn
+        self.trader.get_current_time = lambda tz=None, now=None: _local(12, 0)
+
+    def test_session_and_automation_reads_hold_the_lock(self):
+        sessions = self.trader.get_active_sessions()
+        self.trader._get_current_automation_active_symbols()
+
+        self.assertIn("Always", [name for name, _ in sessions])
+        self.assertEqual(self.conn.held, [True, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
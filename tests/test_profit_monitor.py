@@ -0,0 +1,285 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import mt5_stub
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_mt5 = mt5_stub.install()
+
+# The module attaches a file handler under logs/ at import time
+with patch("logging.FileHandler", lambda *args, **kwargs: MagicMock(level=0)):
+    from src.core import profit_monitor
+
+
+def _make_db():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    with open(os.path.join(PROJECT_ROOT, "database", "schema.sql")) as f:
+        conn.executescript(f.read())
+    conn.close()
+    return path
+
+
+def _make_monitor(db_path):
+    config = {"profit_monitor": {"check_interval": 0}, "mt5": {}, "db": {"path": db_path}}
+    with patch.object(profit_monitor, "load_config", return_value=config), \
+         patch.object(profit_monitor, "get_config_manager", return_value=MagicMock()), \
+         patch.object(profit_monitor.ProfitMonitor, "initialize_mt5", return_value=True):
+        return profit_monitor.ProfitMonitor()
+
+
+def _close_ops(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT operation_type, positions_closed, positions_failed, status FROM position_close_operations ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+class TestCloseOperationWriter(unittest.TestCase):
+    def setUp(self):
+        self.db_path = _make_db()
+        self.monitor = _make_monitor(self.db_path)
+
+    def tearDown(self):
+        self.monitor.stop_writer()
+        os.remove(self.db_path)
+
+    def test_writer_starts_with_first_row(self):
+        self.assertIsNone(self.monitor._writer_thread)
+        self.monitor.record_close_operation("all", {"closed": 1, "failed": 0})
+        self.assertTrue(self.monitor._writer_thread.is_alive())
+
+    def test_queued_close_ops_are_written_after_stop_writer(self):
+        for i in range(20):
+            self.monitor.record_close_operation("profit", {"closed": i, "failed": 1})
+        self.monitor.record_close_operation("loss", {"error": "boom"})
+
+        self.monitor.stop_writer()
+
+        rows = _close_ops(self.db_path)
+        self.assertEqual(len(rows), 21)
+        self.assertEqual(rows[0], ("profit", 0, 1, "completed"))
+        self.assertEqual(rows[-1], ("loss", 0, 0, "failed"))
+        self.assertFalse(self.monitor._writer_thread.is_alive())
+
+    def test_stop_writer_is_idempotent(self):
+        self.monitor.stop_writer()
+        self.monitor.record_close_operation("all", {"closed": 2, "failed": 0})
+        self.monitor.stop_writer()
+        self.monitor.stop_writer()
+
+        self.assertEqual(_close_ops(self.db_path), [("all", 2, 0, "completed")])
+
+    def test_close_op_after_stop_is_written_inline(self):
+        self.monitor.record_close_operation("all", {"closed": 1, "failed": 0})
+        self.monitor.stop_writer()
+
+        self.monitor.record_close_operation("single", {"closed": 1, "failed": 0})
+
+        self.assertEqual(self.monitor._write_q.qsize(), 0)
+        self.assertEqual(_close_ops(self.db_path), [("all", 1, 0, "completed"), ("single", 1, 0, "completed")])
+
+    def test_request_stop_ends_run_and_flushes(self):
+        def tick():
+            self.monitor.record_close_operation("all", {"closed": 3, "failed": 0})
+            self.monitor.request_stop()
+
+        with patch.object(self.monitor, "reload_config_if_changed", return_value=False), \
+             patch.object(self.monitor, "process_command_files"), \
+             patch.object(self.monitor, "manage_profitable_positions", side_effect=tick):
+            runner = threading.Thread(target=self.monitor.run)
+            runner.start()
+            runner.join(timeout=5)
+
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(_close_ops(self.db_path), [("all", 3, 0, "completed")])
+
+
+def _position_data(ticket, profit):
+    return {
+        "ticket": ticket, "symbol": "EURUSD", "type": "buy", "volume": 0.1,
+        "open_price": 1.1, "current_price": 1.2, "profit": profit,
+        "profit_percent": 1.0, "time": "2026-01-01 00:00:00",
+    }
+
+
+class TestFlushTick(unittest.TestCase):
+    def setUp(self):
+        self.db_path = _make_db()
+        self.monitor = _make_monitor(self.db_path)
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def _state(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            positions = conn.execute("SELECT ticket, status FROM position_tracking ORDER BY ticket").fetchall()
+            snapshots = conn.execute("SELECT total_positions, net_profit FROM profit_monitoring").fetchall()
+            return positions, snapshots
+        finally:
+            conn.close()
+
+    def test_positions_and_snapshot_are_written_together(self):
+        self.monitor.flush_tick([_position_data(1, 5.0), _position_data(2, -1.0)], {"total_positions": 2, "net_profit": 4.0})
+        self.monitor.flush_tick([_position_data(2, -2.0)], {"positions_count": 1, "net_profit": -2.0})
+
+        positions, snapshots = self._state()
+        self.assertEqual(positions, [(1, "closed"), (2, "open")])
+        self.assertEqual(snapshots, [(2, 4.0), (1, -2.0)])
+
+    def test_failed_snapshot_rolls_back_position_changes(self):
+        self.monitor.flush_tick([_position_data(1, 5.0)], {"total_positions": 1, "net_profit": 5.0})
+
+        # A summary row with the wrong arity makes the profit_monitoring insert fail
+        with patch.object(profit_monitor.ProfitMonitor, "_summary_row", staticmethod(lambda data: (1,))):
+            self.monitor.flush_tick([_position_data(2, 1.0)], {"total_positions": 1})
+
+        positions, snapshots = self._state()
+        self.assertEqual(positions, [(1, "open")])
+        self.assertEqual(snapshots, [(1, 5.0)])
+
+    def test_tick_flush_checkpoints_wal_without_close_operations(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        wal_path = self.db_path + "-wal"
+        try:
+            # An open reader, like the web app, keeps the -wal file from being removed on close
+            conn.execute("SELECT 1 FROM profit_monitoring").fetchall()
+
+            self.monitor.flush_tick([_position_data(1, 5.0)], {"total_positions": 1})
+            self.assertGreater(os.path.getsize(wal_path), 0)
+
+            self.monitor._last_checkpoint -= profit_monitor._WAL_CHECKPOINT_INTERVAL
+            self.monitor.flush_tick([_position_data(1, 6.0)], {"total_positions": 1})
+
+            self.assertEqual(os.path.getsize(wal_path), 0)
+            self.assertIsNone(self.monitor._writer_thread)
+        finally:
+            conn.close()
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
+
+    def test_connections_cap_the_journal_size(self):
+        conn = self.monitor.get_db_connection()
+        try:
+            limit = conn.execute("PRAGMA journal_size_limit").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(limit, profit_monitor._JOURNAL_SIZE_LIMIT)
+
+
+def _positions(count, seed):
+    rnd = random.Random(seed)
+    return tuple(
+        SimpleNamespace(
+            ticket=1000 + i, symbol="EURUSD", type=rnd.choice((0, 1)), volume=0.1, magic=0,
+            profit=rnd.choice((0.0, round(rnd.uniform(-50, 50), 2))),
+        )
+        for i in range(count)
+    )
+
+
+def _serial_close(positions, condition, close_fn):
+    """The original one-at-a-time close loop the parallel version must agree with"""
+    closed = failed = 0
+    total_profit = total_loss = 0.0
+    for pos in positions:
+        if condition == "all" or (condition == "profit" and pos.profit > 0) or (condition == "loss" and pos.profit < 0):
+            if close_fn(pos):
+                closed += 1
+                if pos.profit >= 0:
+                    total_profit += pos.profit
+                else:
+                    total_loss += abs(pos.profit)
+            else:
+                failed += 1
+    return closed, failed, total_profit, total_loss
+
+
+class TestParallelClose(unittest.TestCase):
+    def setUp(self):
+        self.db_path = _make_db()
+        self.monitor = _make_monitor(self.db_path)
+
+    def tearDown(self):
+        self.monitor.stop_writer()
+        os.remove(self.db_path)
+
+    def test_tally_matches_serial_baseline(self):
+        def close_fn(pos):
+            return pos.ticket % 3 != 0
+
+        for seed in range(20):
+            positions = _positions(random.Random(seed).randint(0, 30), seed)
+            for condition in ("all", "profit", "loss"):
+                closed, failed, total_profit, total_loss = \
+                    self.monitor._close_positions(positions, condition, close_fn)
+                expected = _serial_close(positions, condition, close_fn)
+                self.assertEqual((closed, failed), expected[:2])
+                self.assertAlmostEqual(total_profit, expected[2], places=6)
+                self.assertAlmostEqual(total_loss, expected[3], places=6)
+
+    def test_unknown_condition_closes_nothing(self):
+        self.monitor.initialized = True
+
+        with patch.object(self.monitor, "get_open_positions", return_value=_positions(5, seed=1)), \
+             patch.object(self.monitor, "close_position") as close_position, \
+             patch.object(self.monitor, "close_position_with_retry") as close_with_retry, \
+             patch.object(self.monitor, "record_close_operation") as record:
+            by_type = self.monitor.close_positions_by_type("breakeven")
+            by_condition = self.monitor.close_positions_by_condition("breakeven")
+
+        self.assertNotIn("error", by_type)
+        self.assertEqual((by_type["closed"], by_type["failed"]), (0, 0))
+        self.assertEqual(record.call_args[0], ("breakeven", by_type))
+        self.assertEqual(by_condition["status"], "success")
+        self.assertEqual((by_condition["closed_count"], by_condition["failed_count"]), (0, 0))
+        close_position.assert_not_called()
+        close_with_retry.assert_not_called()
+
+    def test_order_sends_are_serialized(self):
+        in_flight = []
+        peak = []
+        guard = threading.Lock()
+
+        def order_send(request):
+            with guard:
+                in_flight.append(request["position"])
+                peak.append(len(in_flight))
+            time.sleep(0.005)
+            with guard:
+                in_flight.remove(request["position"])
+            return SimpleNamespace(retcode=_mt5.TRADE_RETCODE_DONE, comment="done")
+
+        mt5 = profit_monitor.mt5
+        positions = _positions(16, seed=7)
+        self.monitor.initialized = True
+        with patch.object(mt5, "order_send", order_send, create=True), \
+             patch.object(mt5, "symbol_info", lambda symbol: SimpleNamespace(volume_min=0.01), create=True), \
+             patch.object(mt5, "symbol_info_tick", lambda symbol: SimpleNamespace(bid=1.1, ask=1.2), create=True), \
+             patch.object(self.monitor, "normalize_volume", lambda symbol, volume: volume), \
+             patch.object(self.monitor, "get_supported_filling_mode", return_value=1), \
+             patch.object(self.monitor, "get_open_positions", return_value=positions):
+            result = self.monitor.close_positions_by_type("all")
+
+        self.assertEqual((result["closed"], result["failed"]), (16, 0))
+        self.assertEqual(len(peak), 16)
+        self.assertEqual(max(peak), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
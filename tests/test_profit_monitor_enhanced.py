@@ -0,0 +1,193 @@
+import json
+import os
+import queue
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import mt5_stub
+
+_mt5 = mt5_stub.install()
+
+# The module attaches a file handler under logs/ at import time
+with patch("logging.FileHandler", lambda *args, **kwargs: MagicMock(level=0)):
+    from src.core import profit_monitor_enhanced
+
+
+def _mt5_position(ticket, profit, open_time, symbol="EURUSD", type_=0):
+    return SimpleNamespace(
+        ticket=ticket, symbol=symbol, type=type_, magic=0, volume=0.1,
+        price_open=1.1, price_current=1.2, profit=profit, time=open_time,
+        swap=0.0, commission=0.0,
+    )
+
+
+def _make_monitor():
+    # Skip __init__: it starts file watchers, writer threads and an MT5 connection
+    monitor = profit_monitor_enhanced.EnhancedProfitMonitor.__new__(profit_monitor_enhanced.EnhancedProfitMonitor)
+    monitor.pos_arrays = None
+    monitor._positions_fingerprint = None
+    monitor.profit_cache = {}
+    return monitor
+
+
+class TestRealTimePositions(unittest.TestCase):
+    def test_open_time_is_iso_for_callers_and_raw_in_snapshot(self):
+        monitor = _make_monitor()
+        positions = (_mt5_position(1, 5.0, 1767225600), _mt5_position(2, -3.0, 1767229200))
+
+        with patch.object(_mt5, "positions_get", return_value=positions, create=True):
+            result = monitor.get_real_time_positions()
+
+        self.assertEqual(
+            [p["open_time"] for p in result],
+            [datetime.fromtimestamp(1767225600).isoformat(), datetime.fromtimestamp(1767229200).isoformat()],
+        )
+        self.assertEqual([(p["ticket"], p["type"], p["profit"]) for p in result], [(1, "BUY", 5.0), (2, "BUY", -3.0)])
+
+        # Internal consumers still see raw MT5 seconds
+        self.assertEqual(monitor.pos_arrays["open_time"].tolist(), [1767225600, 1767229200])
+        self.assertEqual(next(monitor.positions_iter())["open_time"], 1767225600)
+
+    def test_no_positions(self):
+        monitor = _make_monitor()
+        with patch.object(_mt5, "positions_get", return_value=None, create=True):
+            self.assertEqual(monitor.get_real_time_positions(), [])
+
+
+class TestSingleTicketClose(unittest.TestCase):
+    def setUp(self):
+        self.monitor = _make_monitor()
+        self.positions = (_mt5_position(1, 5.0, 1767225600), _mt5_position(2, -3.0, 1767229200))
+        with patch.object(_mt5, "positions_get", return_value=self.positions, create=True):
+            self.monitor._refresh_positions()
+
+    def test_close_uses_cached_snapshot(self):
+        positions_get = MagicMock(return_value=self.positions)
+        with patch.object(_mt5, "positions_get", positions_get, create=True), \
+             patch.object(self.monitor, "_close_single_position_fast", return_value={"success": True}) as close:
+            result = self.monitor._close_single_position_by_ticket(2)
+
+        positions_get.assert_not_called()
+        self.assertEqual(close.call_args[0][0]["ticket"], 2)
+        self.assertEqual((result["status"], result["closed"], result["failed"]), ("completed", 1, 0))
+        self.assertEqual((result["total_profit_closed"], result["total_loss_closed"]), (0, 3.0))
+
+    def test_ticket_newer_than_snapshot_refreshes_once(self):
+        newer = self.positions + (_mt5_position(3, 7.5, 1767232800),)
+        positions_get = MagicMock(return_value=newer)
+        with patch.object(_mt5, "positions_get", positions_get, create=True), \
+             patch.object(self.monitor, "_close_single_position_fast", return_value={"success": True}) as close:
+            result = self.monitor._close_single_position_by_ticket(3)
+
+        positions_get.assert_called_once_with()
+        self.assertEqual(close.call_args[0][0]["ticket"], 3)
+        self.assertEqual((result["closed"], result["total_profit_closed"]), (1, 7.5))
+
+    def test_unknown_ticket_is_reported_not_found(self):
+        with patch.object(_mt5, "positions_get", return_value=self.positions, create=True), \
+             patch.object(self.monitor, "_close_single_position_fast") as close:
+            result = self.monitor._close_single_position_by_ticket(99)
+
+        close.assert_not_called()
+        self.assertEqual((result["status"], result["closed"], result["failed"]), ("failed", 0, 1))
+        self.assertIn("not found", result["message"])
+
+
+class TestSubmitCommandFile(unittest.TestCase):
+    def setUp(self):
+        self.monitor = _make_monitor()
+        self.monitor._inflight_commands = set()
+        self.monitor._inflight_lock = threading.Lock()
+        self.monitor.executor = MagicMock()
+        self.monitor._move_to_error_dir = MagicMock()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "cmd_1.json")
+
+    def _write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+
+    def test_file_in_flight_is_not_submitted_again(self):
+        self._write(json.dumps({"id": 1, "type": "all"}))
+
+        self.monitor._submit_command_file(self.path, from_watcher=True)
+        self.monitor._submit_command_file(self.path)
+        self.assertEqual(self.monitor.executor.submit.call_count, 1)
+
+        # Once the execution releases it, a new event submits it again
+        self.monitor._release_command_file(self.path)
+        self.monitor._submit_command_file(self.path, from_watcher=True)
+        self.assertEqual(self.monitor.executor.submit.call_count, 2)
+        self.assertEqual(self.monitor.executor.submit.call_args[0][1:], ({"id": 1, "type": "all"}, self.path))
+
+    def test_partly_written_file_is_retried_on_the_next_event(self):
+        full = json.dumps({"id": 2, "type": "profit"})
+        self._write(full[:10])
+
+        self.monitor._submit_command_file(self.path, from_watcher=True)
+
+        self.monitor.executor.submit.assert_not_called()
+        self.monitor._move_to_error_dir.assert_not_called()
+        self.assertEqual(self.monitor._inflight_commands, set())
+
+        self._write(full)
+        self.monitor._submit_command_file(self.path, from_watcher=True)
+
+        self.assertEqual(self.monitor.executor.submit.call_args[0][1], {"id": 2, "type": "profit"})
+        self.monitor._move_to_error_dir.assert_not_called()
+
+    def test_invalid_file_found_by_polling_is_moved_aside(self):
+        self._write('{"id": 3, "ty')
+
+        self.monitor._submit_command_file(self.path)
+
+        self.monitor.executor.submit.assert_not_called()
+        self.monitor._move_to_error_dir.assert_called_once_with(self.path)
+        self.assertEqual(self.monitor._inflight_commands, set())
+
+    def test_removed_file_is_ignored(self):
+        self.monitor._submit_command_file(self.path, from_watcher=True)
+
+        self.monitor.executor.submit.assert_not_called()
+        self.monitor._move_to_error_dir.assert_not_called()
+        self.assertEqual(self.monitor._inflight_commands, set())
+
+
+class TestStop(unittest.TestCase):
+    def test_stop_wakes_and_ends_run_enhanced(self):
+        monitor = _make_monitor()
+        monitor._observer = None
+        monitor._wake = threading.Event()
+        monitor.executor = MagicMock()
+        monitor._close_executor = MagicMock()
+        monitor.update_queue = queue.Queue()
+        monitor._status_writer = MagicMock()
+        # Long intervals so the loop is parked on its wait when stop() arrives
+        monitor.fast_update_interval = monitor.db_update_interval = monitor.config_check_interval = 3600
+        monitor.last_fast_update = monitor.last_db_update = monitor.last_config_check = 0
+        ticked = threading.Event()
+
+        with patch.object(monitor, "reload_config_if_changed", return_value=False), \
+             patch.object(monitor, "process_commands_async"), \
+             patch.object(monitor, "_refresh_positions"), \
+             patch.object(monitor, "update_database_fast", side_effect=ticked.set):
+            runner = threading.Thread(target=monitor.run_enhanced, daemon=True)
+            runner.start()
+            self.assertTrue(ticked.wait(timeout=5))
+            monitor.stop()
+            runner.join(timeout=5)
+
+        self.assertFalse(runner.is_alive())
+        monitor.executor.shutdown.assert_called_once_with(wait=True)
+        self.assertIsNone(monitor.update_queue.get_nowait())
+        monitor._status_writer.join.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()